@@ -0,0 +1,162 @@
+import itertools
+
+import numpy as np
+
+from CephalopodGame import Board, CephalopodGame, DIRECTIONS, EMPTY, PIP_MASK, RED_FLAG
+
+# Motore vettoriale: N partite indipendenti avanzano insieme, con le board memorizzate in array NumPy.
+# NumPy serve solo a questo modulo (pip install numpy): il gioco e i giocatori non lo usano.
+# test_engine.py confronta il motore con CephalopodGame su partite casuali.
+# Le celle usano la stessa codifica di Board (0 = vuota, pip per Blue, RED_FLAG | pip per Red).
+#
+# Un'azione è un intero cella * ACTIONS_PER_CELL + opzione, dove opzione è l'indice di un sottoinsieme
+# di CAPTURE_SUBSETS (cattura dei vicini in quelle direzioni) oppure PLACE (piazzamento senza cattura).
+
+# Sottoinsiemi di almeno due delle 4 direzioni di DIRECTIONS, nello stesso ordine di get_subsets.
+CAPTURE_SUBSETS = tuple(comb for k in range(2, 5) for comb in itertools.combinations(range(4), k))
+PLACE = len(CAPTURE_SUBSETS)
+ACTIONS_PER_CELL = PLACE + 1
+
+# Matrice (sottoinsiemi x direzioni) con 1 nelle direzioni che fanno parte del sottoinsieme.
+SUBSET_MATRIX = np.zeros((len(CAPTURE_SUBSETS), 4), dtype=np.int16)
+for _k, _subset in enumerate(CAPTURE_SUBSETS):
+    SUBSET_MATRIX[_k, list(_subset)] = 1
+SUBSET_SIZES = SUBSET_MATRIX.sum(axis=1)
+
+
+class BatchCephalopodGame:
+    """N partite di Cephalopod su board size x size, gestite come array NumPy.
+    cells ha forma (N, size*size + 1): l'ultima colonna è una cella fittizia sempre vuota,
+    usata come vicino per le direzioni che escono dalla board. to_move vale 0 per Blue e 1 per Red."""
+
+    def __init__(self, n_boards, size=5, first_player="Blue"):
+        self.size = size
+        self.n_cells = size * size
+        self.cells = np.zeros((n_boards, self.n_cells + 1), dtype=np.uint8)
+        self.to_move = np.full(n_boards, 0 if first_player == "Blue" else 1, dtype=np.uint8)
+        # Indici dei vicini (n_cells, 4) nell'ordine di DIRECTIONS; fuori dalla board -> cella fittizia
+        self.neighbours = np.full((self.n_cells, 4), self.n_cells, dtype=np.intp)
+        for r in range(size):
+            for c in range(size):
+                for d, (dr, dc) in enumerate(DIRECTIONS):
+                    nr, nc = r+dr, c+dc
+                    if 0 <= nr < size and 0 <= nc < size:
+                        self.neighbours[r * size + c, d] = nr * size + nc
+
+    @property
+    def n_boards(self):
+        return len(self.cells)
+
+    @classmethod
+    def from_boards(cls, boards):
+        """Crea il batch a partire da una lista di Board della stessa dimensione."""
+        batch = cls(len(boards), boards[0].size)
+        for i, state in enumerate(boards):
+            batch.cells[i, :batch.n_cells] = np.frombuffer(bytes(state.cells), dtype=np.uint8)
+            batch.to_move[i] = 0 if state.to_move == "Blue" else 1
+        return batch
+
+    def to_board(self, i):
+        """Restituisce la partita i come Board (last_move non è conservato nel batch)."""
+        return Board(self.size, bytearray(self.cells[i, :self.n_cells].tobytes()),
+                     "Blue" if self.to_move[i] == 0 else "Red")
+
+    def capture_options(self):
+        """Restituisce (capture, sums): capture[b, cella, k] è True se sulla board b la cella è vuota e
+        il sottoinsieme k di vicini è catturabile, sums[b, cella, k] è la somma dei pip catturati."""
+        codes = self.cells[:, self.neighbours]                     # (N, n_cells, 4)
+        occupied = (codes != EMPTY).astype(np.int16)
+        pips = (codes & PIP_MASK).astype(np.int16)
+        sums = pips @ SUBSET_MATRIX.T                              # (N, n_cells, sottoinsiemi)
+        complete = (occupied @ SUBSET_MATRIX.T) == SUBSET_SIZES
+        empty = self.cells[:, :self.n_cells] == EMPTY
+        capture = complete & (sums >= 2) & (sums <= 6) & empty[:, :, None]
+        return capture, sums
+
+    def legal_mask(self):
+        """Maschera (N, n_cells * ACTIONS_PER_CELL) delle azioni legali di ogni board.
+        Come in CephalopodGame.actions, il piazzamento semplice è legale solo se la cella non ha catture."""
+        capture, _ = self.capture_options()
+        empty = self.cells[:, :self.n_cells] == EMPTY
+        place = empty & ~capture.any(axis=2)
+        mask = np.concatenate([capture, place[:, :, None]], axis=2)
+        return mask.reshape(self.n_boards, -1)
+
+    def is_terminal(self):
+        """Vettore booleano delle board piene."""
+        return ~(self.cells[:, :self.n_cells] == EMPTY).any(axis=1)
+
+    def counts(self):
+        """Restituisce (celle Blue, celle Red) per ogni board."""
+        cells = self.cells[:, :self.n_cells]
+        occupied = cells != EMPTY
+        red = occupied & ((cells & RED_FLAG) != 0)
+        return (occupied & ~red).sum(axis=1), red.sum(axis=1)
+
+    def utility(self, player="Blue"):
+        """Utilità delle board terminali per player: 1 se ha vinto, 0 in caso di parità, -1 se ha perso
+        (come CephalopodGame.utility)."""
+        blue, red = self.counts()
+        mine, theirs = (blue, red) if player == "Blue" else (red, blue)
+        return np.where(mine > theirs, 1, np.where(mine < theirs, -1, 0))
+
+    def step(self, actions, active=None):
+        """Applica un'azione per ogni board. Le board con active False (di default quelle terminali)
+        restano invariate e la loro azione viene ignorata. Solleva ValueError per un'azione illegale."""
+        actions = np.asarray(actions, dtype=np.intp)
+        if active is None:
+            active = ~self.is_terminal()
+        rows = np.nonzero(active)[0]
+        if len(rows) == 0:
+            return
+        actions = actions[rows]
+        capture, sums = self.capture_options()
+        legal = np.concatenate([capture, (~capture.any(axis=2))[:, :, None]], axis=2)
+        cell, option = np.divmod(actions, ACTIONS_PER_CELL)
+        if (self.cells[rows, cell] != EMPTY).any() or not legal[rows, cell, option].all():
+            raise ValueError("Azione illegale nel batch")
+        is_capture = option != PLACE
+        subset = np.where(is_capture, option, 0)
+        pip = np.where(is_capture, sums[rows, cell, subset], 1).astype(np.uint8)
+        # Rimuove i vicini catturati: le direzioni fuori dal sottoinsieme puntano alla cella fittizia
+        members = (SUBSET_MATRIX[subset] != 0) & is_capture[:, None]
+        targets = np.where(members, self.neighbours[cell], self.n_cells)
+        self.cells[rows[:, None], targets] = EMPTY
+        self.cells[rows, cell] = self.to_move[rows] * RED_FLAG | pip
+        self.to_move[rows] ^= 1
+
+    def random_actions(self, rng=None):
+        """Sceglie uniformemente un'azione legale per ogni board (-1 per le board senza mosse)."""
+        rng = np.random.default_rng() if rng is None else rng
+        mask = self.legal_mask()
+        scores = np.where(mask, rng.random(mask.shape), -1.0)
+        actions = scores.argmax(axis=1)
+        return np.where(mask.any(axis=1), actions, -1)
+
+    def playout(self, rng=None, max_steps=None):
+        """Gioca mosse casuali su tutte le board fino alla fine (o per max_steps passi)."""
+        steps = 0
+        while not self.is_terminal().all() and (max_steps is None or steps < max_steps):
+            self.step(self.random_actions(rng))
+            steps += 1
+        return steps
+
+    def action_to_move(self, i, action):
+        """Converte l'azione della board i nella mossa ((r, c), pip, captured) di CephalopodGame."""
+        cell, option = divmod(int(action), ACTIONS_PER_CELL)
+        position = divmod(cell, self.size)
+        if option == PLACE:
+            return (position, 1, ())
+        neighbours = self.neighbours[cell]
+        captured = tuple(divmod(int(neighbours[d]), self.size) for d in CAPTURE_SUBSETS[option])
+        pip = int(sum(self.cells[i, neighbours[d]] & PIP_MASK for d in CAPTURE_SUBSETS[option]))
+        return (position, pip, captured)
+
+    def move_to_action(self, move):
+        """Converte una mossa di CephalopodGame nell'azione corrispondente."""
+        (r, c), pip, captured = move
+        if not captured:
+            return (r * self.size + c) * ACTIONS_PER_CELL + PLACE
+        directions = tuple(sorted(DIRECTIONS.index((rr - r, cc - c)) for rr, cc in captured))
+        return (r * self.size + c) * ACTIONS_PER_CELL + CAPTURE_SUBSETS.index(directions)
+
@@ -1,9 +1,8 @@
 import tkinter as tk
 from tkinter import simpledialog, messagebox
 from tkinter import ttk
-import random, itertools, copy, concurrent.futures, threading, time
-
-import playingStrategies_Gallo_Mari 
+import random, itertools, copy, concurrent.futures, threading, time, argparse, importlib
+from array import array
 
 #import sys
 #sys.path.append("Progetti studenti maggio 2025")
@@ -42,34 +41,175 @@ class Game:
         """Return the value of this final state to player."""
         raise NotImplementedError
 
+# Codifica compatta di una cella in un byte: 0 = vuota, pip (1..6) per Blue, RED_FLAG | pip per Red.
+EMPTY = 0
+RED_FLAG = 8
+PIP_MASK = 7
+PLAYER_FLAG = {"Blue": 0, "Red": RED_FLAG}
+
+# Tabella di decodifica: codice della cella -> valore esposto da board[r][c] (None oppure (giocatore, pip)).
+# Le tuple sono condivise, quindi leggere la board non alloca nulla.
+CELL_VALUES = [None] * 16
+for _pip in range(1, 7):
+    CELL_VALUES[_pip] = ("Blue", _pip)
+    CELL_VALUES[RED_FLAG | _pip] = ("Red", _pip)
+
+def encode_cell(cell):
+    """Converte None o (giocatore, pip) nel codice compatto della cella."""
+    if cell is None:
+        return EMPTY
+    player, pip = cell
+    return PLAYER_FLAG[player] | pip
+
+# Chiavi di Zobrist: un intero casuale a 64 bit per ogni coppia (cella, codice) e uno per il turno di Red.
+# Il generatore ha un seme fisso, quindi le chiavi sono le stesse in ogni processo ed esecuzione.
+ZOBRIST_RED_TO_MOVE = random.Random("Cephalopod").getrandbits(64)
+_zobrist_tables = {}
+
+def zobrist_table(size):
+    """Restituisce, per ogni indice di cella, la lista delle chiavi indicizzata dal codice della cella
+    (la chiave della cella vuota è 0)."""
+    table = _zobrist_tables.get(size)
+    if table is None:
+        rnd = random.Random(size)
+        table = []
+        for _ in range(size * size):
+            keys = [0] * 16
+            for pip in range(1, 7):
+                keys[pip] = rnd.getrandbits(64)
+                keys[RED_FLAG | pip] = rnd.getrandbits(64)
+            table.append(keys)
+        _zobrist_tables[size] = table
+    return table
+
 # Classe che rappresenta lo stato della board.
+# Le celle sono memorizzate in un bytearray piatto (indice r * size + c), per cui copy() è una
+# singola copia di memoria. L'attributo board resta disponibile come vista a righe di sola lettura.
+# key è la chiave di Zobrist della posizione (celle e turno), aggiornata in modo incrementale da
+# CephalopodGame: due board sono uguali se hanno le stesse celle e lo stesso giocatore di turno.
+# Per questo to_move va cambiato solo attraverso le mosse del gioco.
+# _counters contiene [celle vuote, celle Blue, celle Red, pip Blue, pip Red], anch'essi aggiornati
+# a ogni mossa, così is_full, count e pips sono a costo costante.
 class Board:
+    __slots__ = ('size', 'cells', 'to_move', 'last_move', 'key', '_counters', 'board')
+
     def __init__(self, size, board=None, to_move="Blue", last_move=None):
         self.size = size
         if board is None:
-            self.board = [[None for _ in range(size)] for _ in range(size)]
+            self.cells = bytearray(size * size)
+        elif isinstance(board, (bytes, bytearray)):
+            self.cells = bytearray(board)
         else:
-            self.board = board
+            self.cells = bytearray(encode_cell(cell) for row in board for cell in row)
         self.to_move = to_move      # "Blue" o "Red"
         self.last_move = last_move  # (cella_inserimento, celle_catturate)
+        self.key = self.compute_key()
+        self._counters = self.compute_counters()
+
+    def compute_key(self):
+        """Calcola da zero la chiave di Zobrist della posizione."""
+        table = zobrist_table(self.size)
+        key = ZOBRIST_RED_TO_MOVE if self.to_move == "Red" else 0
+        for i, code in enumerate(self.cells):
+            if code != EMPTY:
+                key ^= table[i][code]
+        return key
+
+    def compute_counters(self):
+        """Calcola da zero i contatori di celle e pip."""
+        counters = [0, 0, 0, 0, 0]
+        for code in self.cells:
+            if code == EMPTY:
+                counters[0] += 1
+            else:
+                owner = code >> 3
+                counters[1 + owner] += 1
+                counters[3 + owner] += code & PIP_MASK
+        return counters
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self.key == other.key and self.to_move == other.to_move and self.cells == other.cells
+
+    def __hash__(self):
+        return self.key
+
+    def __getattr__(self, name):
+        # Invocato solo quando lo slot 'board' non è ancora stato costruito: la vista a righe
+        # (board[r][c] è None oppure (giocatore, pip)) viene creata alla prima lettura e poi
+        # letta come un normale attributo. La vista non va modificata: per scrivere usare set_cell.
+        if name != 'board':
+            raise AttributeError(name)
+        values = CELL_VALUES
+        cells = self.cells
+        n = self.size
+        rows = [[values[v] for v in cells[i:i + n]] for i in range(0, n * n, n)]
+        self.board = rows
+        return rows
+
+    def _invalidate_rows(self):
+        try:
+            del self.board
+        except AttributeError:
+            pass
+
+    def _cached_rows(self):
+        # Legge lo slot senza passare da __getattr__, quindi senza costruire la vista
+        try:
+            return _BOARD_SLOT.__get__(self, Board)
+        except AttributeError:
+            return None
+
+    def set_cell(self, r, c, cell):
+        """Scrive None oppure (giocatore, pip) nella cella (r, c)."""
+        i = r * self.size + c
+        keys = zobrist_table(self.size)[i]
+        code = encode_cell(cell)
+        old = self.cells[i]
+        self.key ^= keys[old] ^ keys[code]
+        self.cells[i] = code
+        counters = self._counters
+        for value, sign in ((old, -1), (code, 1)):
+            if value == EMPTY:
+                counters[0] += sign
+            else:
+                counters[1 + (value >> 3)] += sign
+                counters[3 + (value >> 3)] += sign * (value & PIP_MASK)
+        self._invalidate_rows()
 
     def copy(self):
-        new_board = [row[:] for row in self.board]
-        return Board(self.size, new_board, self.to_move, self.last_move)
+        new_state = self._copy_cells()
+        # La vista a righe è di sola lettura: la copia la condivide finché non viene modificata
+        rows = self._cached_rows()
+        if rows is not None:
+            new_state.board = rows
+        return new_state
+
+    def _copy_cells(self):
+        new_state = Board.__new__(Board)
+        new_state.size = self.size
+        new_state.cells = self.cells[:]
+        new_state.to_move = self.to_move
+        new_state.last_move = self.last_move
+        new_state.key = self.key
+        new_state._counters = self._counters[:]
+        return new_state
 
     def is_full(self):
-        for row in self.board:
-            if any(cell is None for cell in row):
-                return False
-        return True
+        return self._counters[0] == 0
 
     def count(self, player):
-        cnt = 0
-        for row in self.board:
-            for cell in row:
-                if cell is not None and cell[0] == player:
-                    cnt += 1
-        return cnt
+        return self._counters[1 + (PLAYER_FLAG[player] >> 3)]
+
+    def count_empty(self):
+        return self._counters[0]
+
+    def pips(self, player):
+        """Somma dei pip delle celle di player."""
+        return self._counters[3 + (PLAYER_FLAG[player] >> 3)]
+
+_BOARD_SLOT = Board.board
 
 # Funzione ausiliaria che genera tutti i sottoinsiemi (delle celle adiacenti) con dimensione minima min_size.
 def get_subsets(adjacent, min_size=2):
@@ -80,6 +220,131 @@ def get_subsets(adjacent, min_size=2):
             subsets.append(list(comb))
     return subsets
 
+# Direzioni dei vicini ortogonali, nell'ordine in cui vengono generate le catture.
+DIRECTIONS = [(-1,0), (1,0), (0,-1), (0,1)]
+
+# Tabelle dei vicini, una per dimensione della board (calcolate una sola volta).
+_neighbour_tables = {}
+
+def neighbour_table(size):
+    """Restituisce, per ogni indice di cella r * size + c, la tupla dei vicini dentro la board
+    come coppie (indice_vicino, (nr, nc)), nell'ordine di DIRECTIONS."""
+    table = _neighbour_tables.get(size)
+    if table is None:
+        table = []
+        for r in range(size):
+            for c in range(size):
+                neighbours = []
+                for dr, dc in DIRECTIONS:
+                    nr, nc = r+dr, c+dc
+                    if 0 <= nr < size and 0 <= nc < size:
+                        neighbours.append((nr * size + nc, (nr, nc)))
+                table.append(tuple(neighbours))
+        table = tuple(table)
+        _neighbour_tables[size] = table
+    return table
+
+# Tabelle delle posizioni: indice di cella -> (r, c), una per dimensione della board.
+_position_tables = {}
+
+def position_table(size):
+    table = _position_tables.get(size)
+    if table is None:
+        table = tuple((r, c) for r in range(size) for c in range(size))
+        _position_tables[size] = table
+    return table
+
+# Tabelle dei soli indici dei vicini, una per dimensione della board.
+_neighbour_index_tables = {}
+
+def neighbour_indices(size):
+    table = _neighbour_index_tables.get(size)
+    if table is None:
+        table = tuple(tuple(j for j, _ in neighbours) for neighbours in neighbour_table(size))
+        _neighbour_index_tables[size] = table
+    return table
+
+# Tabella delle catture: per ogni tupla di pip dei vicini occupati (da 2 a 4, nell'ordine dei vicini)
+# contiene le coppie (indici_catturati, somma) dei sottoinsiemi con almeno due celle e somma tra 2 e 6,
+# nello stesso ordine prodotto da get_subsets. Una tupla vuota indica che non ci sono catture.
+CAPTURE_TABLE = {}
+for _k in range(2, 5):
+    for _pips in itertools.product(range(1, 7), repeat=_k):
+        _options = []
+        for _subset in get_subsets(range(_k), 2):
+            _s = sum(_pips[i] for i in _subset)
+            if 2 <= _s <= 6:
+                _options.append((tuple(_subset), _s))
+        CAPTURE_TABLE[_pips] = tuple(_options)
+
+# Numero di catture per ogni configurazione dei vicini occupati di una cella vuota, indicizzata dal
+# numero in base 8 formato dai loro pip nell'ordine dei vicini (i pip sono almeno 1, quindi ogni
+# sequenza ha un indice diverso). Le configurazioni con meno di due vicini occupati valgono 0.
+CAPTURE_COUNT = [0] * 8 ** 4
+for _pips, _options in CAPTURE_TABLE.items():
+    _index = 0
+    for _pip in _pips:
+        _index = _index * 8 + _pip
+    CAPTURE_COUNT[_index] = len(_options)
+
+# Le 8 simmetrie del quadrato (identità, rotazioni di 90/180/270 gradi e 4 riflessioni),
+# come funzioni (r, c, n) -> (r', c') su una board n x n.
+SYMMETRIES = (
+    lambda r, c, n: (r, c),
+    lambda r, c, n: (c, n-1-r),
+    lambda r, c, n: (n-1-r, n-1-c),
+    lambda r, c, n: (n-1-c, r),
+    lambda r, c, n: (r, n-1-c),
+    lambda r, c, n: (n-1-r, c),
+    lambda r, c, n: (c, r),
+    lambda r, c, n: (n-1-c, n-1-r),
+)
+# INVERSE_SYMMETRY[t] è la trasformazione che annulla la t-esima.
+INVERSE_SYMMETRY = (0, 3, 2, 1, 4, 5, 6, 7)
+
+_symmetry_tables = {}
+
+def symmetry_table(size):
+    """Restituisce, per ogni simmetria t, la permutazione degli indici di cella:
+    table[t][i] è l'indice dell'immagine della cella i."""
+    table = _symmetry_tables.get(size)
+    if table is None:
+        table = []
+        for transform in SYMMETRIES:
+            perm = []
+            for r in range(size):
+                for c in range(size):
+                    tr, tc = transform(r, c, size)
+                    perm.append(tr * size + tc)
+            table.append(tuple(perm))
+        table = tuple(table)
+        _symmetry_tables[size] = table
+    return table
+
+# Posizione di ogni direzione in DIRECTIONS, per riordinare le celle catturate dopo una trasformazione.
+_DIRECTION_INDEX = {d: k for k, d in enumerate(DIRECTIONS)}
+
+# Codifica compatta di una mossa in un intero senza segno (adatto a array('I')):
+# bit 0-7 indice della cella, bit 8-10 pip, bit 11-14 maschera delle direzioni catturate
+# (il bit d corrisponde a DIRECTIONS[d]). Per questo la board può essere al massimo MAX_BOARD_SIZE x MAX_BOARD_SIZE.
+MAX_BOARD_SIZE = 15
+MOVE_CELL_MASK = 0xFF
+MOVE_PIP_SHIFT = 8
+MOVE_CAPTURE_SHIFT = 11
+# Numero di celle catturate per ogni maschera di direzioni.
+CAPTURE_MASK_SIZE = tuple(bin(_mask).count("1") for _mask in range(16))
+
+_direction_tables = {}
+
+def direction_table(size):
+    """Come neighbour_table, ma per ogni vicino dentro la board restituisce (indice_vicino, bit_direzione)."""
+    table = _direction_tables.get(size)
+    if table is None:
+        table = tuple(tuple((j, 1 << _DIRECTION_INDEX[(nr - r, nc - c)]) for j, (nr, nc) in neighbours)
+                      for (r, c), neighbours in zip(position_table(size), neighbour_table(size)))
+        _direction_tables[size] = table
+    return table
+
 # Classe che definisce le regole del gioco Cephalopod.
 class CephalopodGame(Game):
     """Il gioco Cephalopod è un gioco a turni per due giocatori, Blue e Red.
@@ -88,70 +353,382 @@ class CephalopodGame(Game):
     e rimuoverle dalla board. Il gioco termina quando la board è piena o non ci sono più mosse legali.
     Il giocatore che occupa la maggioranza delle celle vince."""
     def __init__(self, size=5, first_player="Blue"):
+        if not 1 <= size <= MAX_BOARD_SIZE:
+            raise ValueError("La dimensione della board deve essere tra 1 e %d" % MAX_BOARD_SIZE)
         self.size = size
         self.first_player = first_player
         self.initial = Board(size, to_move=first_player)
+        self._decoded_moves = {}
+        # Secondi a disposizione per ogni mossa dell'AI: ai_move lo aggiorna prima di chiamare la
+        # strategia, così i giocatori dimensionano la ricerca sul limite di tempo effettivo.
+        self.time_out = 3
     
     # Restituisce l’insieme delle mosse legali.
     # Una mossa è una tupla: ((r,c), pip, captured)
     def actions(self, state):
         moves = []
-        for r in range(state.size):
-            for c in range(state.size):
-                if state.board[r][c] is None:  # cella vuota
-                    adjacent = []
-                    for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
-                        nr, nc = r+dr, c+dc
-                        if 0 <= nr < state.size and 0 <= nc < state.size:
-                            if state.board[nr][nc] is not None:
-                                adjacent.append(((nr, nc), state.board[nr][nc][1]))
-                    capture_moves = []
-                    if len(adjacent) >= 2:
-                        subsets = get_subsets(adjacent, 2)
-                        for subset in subsets:
-                            s = sum(pip for pos, pip in subset)
-                            if 2 <= s <= 6:
-                                positions = tuple(pos for pos, pip in subset)
-                                capture_moves.append( ((r,c), s, positions) )
-                    if capture_moves:
-                        moves.extend(capture_moves)
-                    else:
-                        moves.append( ((r,c), 1, ()) )
+        cells = state.cells
+        neighbours = neighbour_table(state.size)
+        positions = position_table(state.size)
+        for i, code in enumerate(cells):
+            if code != EMPTY:
+                continue
+            # Vicini occupati della cella vuota: posizioni e pip
+            adjacent = []
+            pips = []
+            for j, pos in neighbours[i]:
+                code = cells[j]
+                if code != EMPTY:
+                    adjacent.append(pos)
+                    pips.append(code & PIP_MASK)
+            if len(pips) >= 2:
+                options = CAPTURE_TABLE[tuple(pips)]
+                if options:
+                    cell = positions[i]
+                    for subset, s in options:
+                        moves.append((cell, s, tuple([adjacent[k] for k in subset])))
+                    continue
+            moves.append((positions[i], 1, ()))
+        return moves
+
+    # Numero di mosse legali, uguale a len(actions(state)), contato senza costruire le mosse:
+    # ogni cella vuota vale il numero delle sue catture (da CAPTURE_COUNT) oppure 1 piazzamento.
+    def count_actions(self, state):
+        cells = state.cells
+        neighbours = neighbour_indices(state.size)
+        counts = CAPTURE_COUNT
+        total = 0
+        for i, code in enumerate(cells):
+            if code == EMPTY:
+                pattern = 0
+                for j in neighbours[i]:
+                    if cells[j]:
+                        pattern = pattern * 8 + (cells[j] & PIP_MASK)
+                total += counts[pattern] or 1
+        return total
+
+    # Numero delle mosse legali con cattura, contato come in count_actions.
+    def count_captures(self, state):
+        cells = state.cells
+        neighbours = neighbour_indices(state.size)
+        counts = CAPTURE_COUNT
+        total = 0
+        for i, code in enumerate(cells):
+            if code == EMPTY:
+                pattern = 0
+                for j in neighbours[i]:
+                    if cells[j]:
+                        pattern = pattern * 8 + (cells[j] & PIP_MASK)
+                total += counts[pattern]
+        return total
+
+    # Versione lazy di actions: le mosse vengono generate una alla volta, quindi chi le consuma
+    # (per esempio un ciclo alpha-beta che va in taglio) può fermarsi senza costruire le altre.
+    # order può essere:
+    #   "board"    - lo stesso ordine di actions
+    #   "captures" - prima le catture con più celle catturate (a parità, in ordine di board),
+    #                poi i piazzamenti senza cattura
+    #   una funzione chiave - le mosse in ordine crescente di chiave (costruisce comunque tutta la lista)
+    def iter_actions(self, state, order="board"):
+        if callable(order):
+            yield from sorted(self.actions(state), key=order)
+            return
+        if order not in ("board", "captures"):
+            raise ValueError("Ordine delle mosse sconosciuto: %r" % (order,))
+        cells = state.cells
+        neighbours = neighbour_table(state.size)
+        positions = position_table(state.size)
+        by_captures = order == "captures"
+        # Celle con catture (indice, vicini occupati, opzioni) e celle senza, usate solo con "captures"
+        capturing = []
+        placements = []
+        for i, code in enumerate(cells):
+            if code != EMPTY:
+                continue
+            adjacent = []
+            pips = []
+            for j, pos in neighbours[i]:
+                code = cells[j]
+                if code != EMPTY:
+                    adjacent.append(pos)
+                    pips.append(code & PIP_MASK)
+            options = CAPTURE_TABLE[tuple(pips)] if len(pips) >= 2 else ()
+            if by_captures:
+                if options:
+                    capturing.append((i, adjacent, options))
+                else:
+                    placements.append(i)
+            elif options:
+                cell = positions[i]
+                for subset, s in options:
+                    yield (cell, s, tuple([adjacent[k] for k in subset]))
+            else:
+                yield (positions[i], 1, ())
+        if by_captures:
+            for n_captured in (4, 3, 2):
+                for i, adjacent, options in capturing:
+                    for subset, s in options:
+                        if len(subset) == n_captured:
+                            yield (positions[i], s, tuple([adjacent[k] for k in subset]))
+            for i in placements:
+                yield (positions[i], 1, ())
+
+    # Codifica una mossa ((r,c), pip, captured) nell'intero compatto descritto da MOVE_CAPTURE_SHIFT.
+    def encode_move(self, move):
+        (r, c), pip, captured = move
+        mask = 0
+        for rr, cc in captured:
+            mask |= 1 << _DIRECTION_INDEX[(rr - r, cc - c)]
+        return (r * self.size + c) | pip << MOVE_PIP_SHIFT | mask << MOVE_CAPTURE_SHIFT
+
+    # Decodifica un intero prodotto da encode_move o actions_encoded. Le tuple decodificate
+    # vengono memorizzate, quindi decodificare più volte la stessa mossa costa una lettura di dizionario.
+    def decode_move(self, code):
+        move = self._decoded_moves.get(code)
+        if move is None:
+            r, c = divmod(code & MOVE_CELL_MASK, self.size)
+            pip = (code >> MOVE_PIP_SHIFT) & PIP_MASK
+            mask = code >> MOVE_CAPTURE_SHIFT
+            captured = tuple((r+dr, c+dc) for d, (dr, dc) in enumerate(DIRECTIONS) if mask >> d & 1)
+            move = ((r, c), pip, captured)
+            self._decoded_moves[code] = move
+        return move
+
+    # Come actions, ma restituisce le mosse codificate in un array('I') senza costruire tuple.
+    # Con order="captures" le catture con più celle catturate vengono prima (come in iter_actions).
+    def actions_encoded(self, state, order="board"):
+        moves = array('I')
+        cells = state.cells
+        directions = direction_table(state.size)
+        for i, code in enumerate(cells):
+            if code != EMPTY:
+                continue
+            bits = []
+            pips = []
+            for j, bit in directions[i]:
+                code = cells[j]
+                if code != EMPTY:
+                    bits.append(bit)
+                    pips.append(code & PIP_MASK)
+            if len(pips) >= 2:
+                options = CAPTURE_TABLE[tuple(pips)]
+                if options:
+                    for subset, s in options:
+                        mask = 0
+                        for k in subset:
+                            mask |= bits[k]
+                        moves.append(i | s << MOVE_PIP_SHIFT | mask << MOVE_CAPTURE_SHIFT)
+                    continue
+            moves.append(i | 1 << MOVE_PIP_SHIFT)
+        if order == "captures":
+            moves = array('I', sorted(moves, key=lambda m: -CAPTURE_MASK_SIZE[m >> MOVE_CAPTURE_SHIFT]))
         return moves
 
     # Restituisce la nuova board ottenuta applicando una mossa.
     def result(self, state, move):
-        new_state = state.copy()
+        new_state = state._copy_cells()
         (r, c), pip, captured = move
         current_player = state.to_move
-        new_state.board[r][c] = (current_player, pip)
+        n = state.size
+        cells = new_state.cells
+        zobrist = zobrist_table(n)
+        i = r * n + c
+        code = PLAYER_FLAG[current_player] | pip
+        cells[i] = code
+        key = state.key ^ ZOBRIST_RED_TO_MOVE ^ zobrist[i][code]
+        counters = new_state._counters
+        counters[0] += len(captured) - 1
+        counters[1 + (code >> 3)] += 1
+        counters[3 + (code >> 3)] += pip
         for pos in captured:
             rr, cc = pos
-            new_state.board[rr][cc] = None
+            j = rr * n + cc
+            old = cells[j]
+            key ^= zobrist[j][old]
+            counters[1 + (old >> 3)] -= 1
+            counters[3 + (old >> 3)] -= old & PIP_MASK
+            cells[j] = EMPTY
+        new_state.key = key
         new_state.last_move = ((r, c), captured)
         new_state.to_move = "Red" if current_player == "Blue" else "Blue"
         return new_state
 
+    # Applica la mossa modificando lo stato sul posto (senza allocare una nuova board)
+    # e restituisce il token da passare a unmake_move per annullarla.
+    def make_move(self, state, move):
+        (r, c), pip, captured = move
+        current_player = state.to_move
+        n = state.size
+        cells = state.cells
+        i = r * n + c
+        zobrist = zobrist_table(n)
+        # Codici delle celle catturate, per poterle ripristinare esattamente
+        removed = tuple([(rr * n + cc, cells[rr * n + cc]) for rr, cc in captured])
+        undo = (i, removed, state.last_move, state.key)
+        code = PLAYER_FLAG[current_player] | pip
+        cells[i] = code
+        key = state.key ^ ZOBRIST_RED_TO_MOVE ^ zobrist[i][code]
+        counters = state._counters
+        counters[0] += len(removed) - 1
+        counters[1 + (code >> 3)] += 1
+        counters[3 + (code >> 3)] += pip
+        for j, old in removed:
+            key ^= zobrist[j][old]
+            counters[1 + (old >> 3)] -= 1
+            counters[3 + (old >> 3)] -= old & PIP_MASK
+            cells[j] = EMPTY
+        state.key = key
+        state._invalidate_rows()
+        state.last_move = ((r, c), captured)
+        state.to_move = "Red" if current_player == "Blue" else "Blue"
+        return undo
+
+    # Annulla sul posto la mossa applicata con make_move (le mosse vanno annullate in ordine inverso).
+    def unmake_move(self, state, undo):
+        i, removed, last_move, key = undo
+        cells = state.cells
+        code = cells[i]
+        cells[i] = EMPTY
+        counters = state._counters
+        counters[0] -= len(removed) - 1
+        counters[1 + (code >> 3)] -= 1
+        counters[3 + (code >> 3)] -= code & PIP_MASK
+        for j, old in removed:
+            cells[j] = old
+            counters[1 + (old >> 3)] += 1
+            counters[3 + (old >> 3)] += old & PIP_MASK
+        state.key = key
+        state._invalidate_rows()
+        state.last_move = last_move
+        state.to_move = "Red" if state.to_move == "Blue" else "Blue"
+
     # Stato terminale se la board è completamente piena.
     def is_terminal(self, state):
         return state.is_full()
 
+    # Punteggio: numero di celle occupate da ciascun giocatore, come dizionario {"Blue": n, "Red": m}.
+    def score(self, state):
+        return {"Blue": state.count("Blue"), "Red": state.count("Red")}
+
+    # Vincitore di uno stato terminale: il giocatore che occupa più celle, None in caso di parità.
+    def winner(self, state):
+        blue, red = state.count("Blue"), state.count("Red")
+        return "Blue" if blue > red else "Red" if red > blue else None
+
     # Funzione utilità: vince il giocatore che occupa la maggioranza delle celle.
-    # Di default in questa implementazione è stato utilizzato il punto di vista del Blue
+    # 1 se player ha vinto, 0 in caso di parità, -1 se ha perso (di default dal punto di vista del Blue).
     def utility(self, state, player = "Blue"):
-        countBlue = state.count("Blue")
-        countRed = state.count("Red")
-        return 1 if player == "Blue" and countBlue > countRed else -1
+        winner = self.winner(state)
+        return 0 if winner is None else 1 if winner == player else -1
+
+    # Forma canonica della posizione rispetto alle 8 simmetrie della board.
+    # Restituisce (chiave, t): la chiave di Zobrist minima tra le 8 posizioni equivalenti e la
+    # simmetria t che porta lo stato nella sua forma canonica. Le mosse della forma canonica si
+    # riportano sullo stato originale con inverse_transform_move(move, t).
+    def canonical(self, state):
+        zobrist = zobrist_table(state.size)
+        side = ZOBRIST_RED_TO_MOVE if state.to_move == "Red" else 0
+        occupied = [(i, code) for i, code in enumerate(state.cells) if code != EMPTY]
+        best_key, best_t = None, 0
+        for t, perm in enumerate(symmetry_table(state.size)):
+            key = side
+            for i, code in occupied:
+                key ^= zobrist[perm[i]][code]
+            if best_key is None or key < best_key:
+                best_key, best_t = key, t
+        return best_key, best_t
+
+    # Restituisce una nuova board ottenuta applicando la simmetria t allo stato.
+    def transform_state(self, state, t):
+        perm = symmetry_table(state.size)[t]
+        cells = bytearray(len(state.cells))
+        for i, code in enumerate(state.cells):
+            cells[perm[i]] = code
+        last_move = state.last_move
+        if last_move is not None:
+            cell, captured = last_move
+            last_move = (self._transform_cell(cell, t), tuple(self._transform_cell(pos, t) for pos in captured))
+        return Board(state.size, cells, state.to_move, last_move)
+
+    def _transform_cell(self, cell, t):
+        r, c = cell
+        return SYMMETRIES[t](r, c, self.size)
+
+    # Applica la simmetria t a una mossa. Le celle catturate vengono riordinate come le genera actions,
+    # così la mossa trasformata è uguale a quella presente in actions dello stato trasformato.
+    def transform_move(self, move, t):
+        cell, pip, captured = move
+        r, c = new_cell = self._transform_cell(cell, t)
+        captured = sorted((self._transform_cell(pos, t) for pos in captured),
+                          key=lambda pos: _DIRECTION_INDEX[(pos[0] - r, pos[1] - c)])
+        return (new_cell, pip, tuple(captured))
+
+    def inverse_transform_move(self, move, t):
+        return self.transform_move(move, INVERSE_SYMMETRY[t])
+
+    # Simmetrie (diverse dall'identità) che lasciano invariata la posizione.
+    def stabilizer(self, state):
+        cells = state.cells
+        return [t for t, perm in enumerate(symmetry_table(state.size)) if t != 0 and
+                all(cells[perm[i]] == code for i, code in enumerate(cells))]
+
+    # Come actions, ma tiene una sola mossa per ogni gruppo di mosse equivalenti per simmetria
+    # (la prima nell'ordine di actions). Utile alla radice di una ricerca con valutazione simmetrica.
+    def unique_actions(self, state):
+        moves = self.actions(state)
+        symmetries = self.stabilizer(state)
+        if not symmetries:
+            return moves
+        unique = []
+        seen = set()
+        for move in moves:
+            if move in seen:
+                continue
+            unique.append(move)
+            for t in symmetries:
+                seen.add(self.transform_move(move, t))
+        return unique
 
 # Giocatore artificiale: sceglie una mossa a caso.
 def random_player(game, state, timeout=3):
     moves = game.actions(state)
     return random.choice(moves)
 
+# Esegue la strategia di un giocatore AI nell'executor con il limite di tempo time_out,
+# che la strategia trova in game.time_out.
+# Se la strategia non risponde in tempo (o restituisce None) viene giocata una mossa casuale.
+def ai_move(executor, strategy, game, state, time_out=3, verbose=True):
+    current_player = state.to_move
+    game.time_out = time_out
+    future = executor.submit(strategy, game, state)
+    try:
+        move = future.result(timeout=time_out)
+        if verbose:
+            print(f"AI {current_player} ha scelto la mossa {move}\n")
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        move = None
+    if move is None:
+        move = random.choice(game.actions(state))
+        print(f"Time-out per {current_player}, effettuata mossa casuale {move}\n")
+    return move
+
+# Partita AI contro AI senza interfaccia grafica, con le stesse regole di tempo della GUI.
+# strategies è un dizionario {"Blue": playerStrategy, "Red": playerStrategy}.
+# Restituisce la lista degli stati della partita, dall'iniziale al terminale.
+def play_game(game, strategies, time_out=3, verbose=False):
+    history = [game.initial]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        while not game.is_terminal(history[-1]):
+            state = history[-1]
+            move = ai_move(executor, strategies[state.to_move], game, state, time_out, verbose)
+            history.append(game.result(state, move))
+    return history
+
 ############################################################
 # Interfaccia grafica del gioco.
 class CephalopodGUI:
-    def __init__(self, game, player_types, time_out=3):
+    def __init__(self, game, player_types, time_out=3, ponder=False):
         # player_types: dizionario con chiavi "Blue" e "Red" e valori "human" o "ai"
         self.game = game
         self.player_types = player_types
@@ -161,6 +738,10 @@ class CephalopodGUI:
         self.waiting_for_human = False
         self.human_move = None
         self.time_out = time_out  # Salviamo il timeout
+        # Pondering: dopo la sua mossa un'AI il cui modulo definisce ponder(game, state, stop_event)
+        # continua a cercare nel tempo dell'avversario. pondering: giocatore -> (stop_event, future)
+        self.ponder = ponder
+        self.pondering = {}
         
         # Variabili per la modalità di selezione della cattura
         self.capture_selection_mode = False
@@ -174,7 +755,8 @@ class CephalopodGUI:
         
         self.root = tk.Tk()
         self.root.title("Cephalopod")
-        self.root.geometry("400x400")
+        side = 70 * self.game.size
+        self.root.geometry(f"{max(400, side)}x{max(400, side + 50)}")
         self.root.configure(bg="white")
         
         self.board_frame = tk.Frame(self.root, bg="white")
@@ -239,9 +821,7 @@ class CephalopodGUI:
             for (rr, cc) in captured:
                 self.cells[rr][cc].config(relief="solid", borderwidth=4)
         if self.game.is_terminal(state):
-            util = self.game.utility(state)
-            winner = "Blue" if util == 1 else "Red"
-            self.status_label.config(text="Vincitore: " + winner)
+            self.status_label.config(text="Vincitore: " + (self.game.winner(state) or "pareggio"))
         else:
             self.status_label.config(text="Turno: " + state.to_move)
         
@@ -337,11 +917,15 @@ class CephalopodGUI:
         while self.auto_mode and not self.game.is_terminal(self.state_history[-1]):
             self.play_turn()
             time.sleep(0.5)
-        if self.game.is_terminal(self.state_history[-1]):
-            if(playingStrategies_Gallo_Mari.casella_player > playingStrategies_Gallo_Mari.casella_opponent):
-                self.show_game_over(f"La partita è terminata. Ha vinto {playingStrategies_Gallo_Mari.player1}! {playingStrategies_Gallo_Mari.casella_player}-{playingStrategies_Gallo_Mari.casella_opponent}")
+        final = self.state_history[-1]
+        if self.game.is_terminal(final):
+            score = self.game.score(final)
+            winner = self.game.winner(final)
+            if winner is None:
+                self.show_game_over(f"La partita è terminata in parità! {score['Blue']}-{score['Red']}")
             else:
-                self.show_game_over(f"La partita è terminata. Ha vinto {playingStrategies_Gallo_Mari.opponent1}! {playingStrategies_Gallo_Mari.casella_opponent}-{playingStrategies_Gallo_Mari.casella_player}")
+                loser = "Red" if winner == "Blue" else "Blue"
+                self.show_game_over(f"La partita è terminata. Ha vinto {winner}! {score[winner]}-{score[loser]}")
             #messagebox.showinfo("Fine partita", "La partita è terminata.")
 
     # Funzione per eseguire il turno del giocatore.
@@ -353,23 +937,13 @@ class CephalopodGUI:
         legal_moves = self.game.actions(state)
         move = None
         if self.player_types[current_player] == "ai":
-            if current_player == "Blue":
-                future = self.executor.submit(playerBmodule.playerStrategy, self.game, state)
-            else:
-                future = self.executor.submit(playerRmodule.playerStrategy, self.game, state)
+            module = playerBmodule if current_player == "Blue" else playerRmodule
+            # Il pondering del giocatore termina prima della sua ricerca, che ne riusa i risultati
+            self.stop_pondering(current_player)
             # Attendi il risultato della funzione di strategia dell'AI
             # Se il risultato non arriva entro il timeout, scegli una mossa casuale
             # e mostra un messaggio di timeout
-            try:
-                move = future.result(timeout=self.time_out)
-                #debug
-                print(f"AI {current_player} ha scelto la mossa {move}\n")
-            except concurrent.futures.TimeoutError:
-                future.cancel()
-                move = None
-            if move is None:
-                move = random.choice(legal_moves)
-                print(f"Time-out per {current_player}, effettuata mossa casuale {move}\n")
+            move = ai_move(self.executor, module.playerStrategy, self.game, state, self.time_out)
         else:
             self.waiting_for_human = True
             self.human_move = None
@@ -387,8 +961,42 @@ class CephalopodGUI:
         self.current_index = len(self.state_history) - 1
         self.update_board()
         if self.game.is_terminal(new_state):
-            util = self.game.utility(new_state)
-            winner = "Blue" if util == 1 else "Red"
+            # A fine partita nessuno deve più pensare nel tempo dell'avversario
+            self.stop_all_pondering()
+        elif self.player_types[current_player] == "ai":
+            self.start_pondering(current_player, module, new_state)
+
+    # Avvia il pondering di player sullo stato dopo la sua mossa, se attivo e se il modulo lo prevede.
+    def start_pondering(self, player, module, state):
+        ponder = getattr(module, "ponder", None)
+        if not self.ponder or ponder is None or self.game.is_terminal(state):
+            return
+        stop_event = threading.Event()
+        self.pondering[player] = (stop_event, self.executor.submit(ponder, self.game, state, stop_event))
+
+    # Ferma il pondering di player e attende che termini, così la ricerca successiva non lo trova in esecuzione.
+    def stop_pondering(self, player):
+        # pop in un solo passo: la fine partita e la chiusura della finestra possono chiamarla insieme
+        entry = self.pondering.pop(player, None)
+        if entry is None:
+            return
+        stop_event, future = entry
+        stop_event.set()
+        try:
+            future.result(timeout=self.time_out)
+        except Exception as e:
+            print(f"Pondering di {player} terminato con errore: {e!r}")
+
+    # Ferma tutti i pondering in corso: il ponder cerca finché il suo evento non viene impostato, e
+    # l'executor attende i suoi thread all'uscita dell'interprete.
+    def stop_all_pondering(self):
+        for player in list(self.pondering):
+            self.stop_pondering(player)
+
+    # Chiusura della finestra: ferma i pondering prima di distruggere l'interfaccia.
+    def close(self):
+        self.stop_all_pondering()
+        self.root.destroy()
 
     # Loop di gioco: se non siamo in modalità AI vs AI senza auto, avvia il loop.
     def run_game_loop(self):
@@ -398,7 +1006,9 @@ class CephalopodGUI:
                     self.play_turn()
                     time.sleep(0.1)
             threading.Thread(target=loop, daemon=True).start()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         self.root.mainloop()
+        self.stop_all_pondering()
 
 
     def show_game_over(self, message):
@@ -417,7 +1027,31 @@ class CephalopodGUI:
         self.root.wait_window(dialog)
 
 # Funzione principale: chiede la modalità e il primo giocatore, quindi avvia l'interfaccia.
-def main():
+# Con --headless gioca invece una partita AI contro AI senza interfaccia, per esempio:
+#   python CephalopodGame.py --headless --size 7 --blue playerMarllo --red playerExampleRandom
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cephalopod")
+    parser.add_argument("--size", type=int, help="dimensione della board (senza questa opzione la GUI la chiede, default 5)")
+    parser.add_argument("--headless", action="store_true", help="partita AI contro AI senza interfaccia grafica")
+    parser.add_argument("--blue", help="modulo del giocatore Blue in modalità headless (default: playerBmodule)")
+    parser.add_argument("--red", help="modulo del giocatore Red in modalità headless (default: playerRmodule)")
+    parser.add_argument("--first", choices=["Blue", "Red"], default="Blue", help="primo giocatore in modalità headless")
+    parser.add_argument("--timeout", type=float, default=3, help="secondi a disposizione per ogni mossa dell'AI")
+    parser.add_argument("--ponder", action="store_true",
+                        help="le AI continuano a cercare nel tempo dell'avversario (nella GUI; in AI contro AI "
+                             "i due thread si dividono la CPU)")
+    args = parser.parse_args(argv)
+
+    if args.headless:
+        blue = importlib.import_module(args.blue) if args.blue else playerBmodule
+        red = importlib.import_module(args.red) if args.red else playerRmodule
+        game = CephalopodGame(size=args.size or 5, first_player=args.first)
+        history = play_game(game, {"Blue": blue.playerStrategy, "Red": red.playerStrategy}, args.timeout, verbose=True)
+        score = game.score(history[-1])
+        print(f"Partita terminata in {len(history) - 1} mosse: Blue {score['Blue']} - Red {score['Red']}, "
+              f"vincitore: {game.winner(history[-1]) or 'pareggio'}")
+        return
+
     root = tk.Tk()
     root.withdraw()
     mode = simpledialog.askinteger("Seleziona modalità", 
@@ -443,10 +1077,14 @@ def main():
                         "Red": "human" if human_player == "Red" else "ai"}
     else:
         player_types = {"Blue": "ai", "Red": "ai"}
+    size = args.size
+    if size is None:
+        size = simpledialog.askinteger("Dimensione della board", "Dimensione della board (da 3 a %d):" % MAX_BOARD_SIZE,
+                                       initialvalue=5, minvalue=3, maxvalue=MAX_BOARD_SIZE, parent=root) or 5
     root.destroy()
     
-    game = CephalopodGame(size=5, first_player=first)
-    gui = CephalopodGUI(game, player_types, time_out=3)
+    game = CephalopodGame(size=size, first_player=first)
+    gui = CephalopodGUI(game, player_types, time_out=args.timeout, ponder=args.ponder)
     gui.run_game_loop()
 
 if __name__ == '__main__':
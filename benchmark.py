@@ -0,0 +1,366 @@
+"""Benchmark del motore di Cephalopod.
+
+Uso:
+    python benchmark.py scaling [--sizes 5 7 9] [--depth 2]
+    python benchmark.py ordering [--size 5] [--depth 3]
+    python benchmark.py pvs [--size 5] [--depth 3] [--aspiration 2]
+    python benchmark.py mtdf [--size 5] [--depth 3]
+    python benchmark.py quiescence [--size 5] [--depth 3] [--limit 4]
+    python benchmark.py lmr [--size 5] [--depth 4] [--min-depth 3] [--late-moves 3] [--time 2.5]
+    python benchmark.py smp [--size 5] [--workers 1 2 4 8] [--time 2.5]
+
+scaling misura, per ogni dimensione della board, la latenza media delle operazioni del motore
+(generazione mosse, result, make/unmake, test terminale, euristiche) e i nodi al secondo di
+h_alphabeta_search. L'ultima colonna stima l'esponente di crescita rispetto al numero di celle:
+circa 1 per un'operazione lineare, sopra 1 per una superlineare.
+
+ordering confronta gli ordinamenti delle mosse di searchEngine sulle stesse posizioni, con
+iterative deepening fino alla stessa profondità: nodi visitati, tempo, frazione di nodi con
+taglio beta e frazione di tagli prodotti dalla prima mossa.
+
+pvs confronta, allo stesso modo, alpha-beta con finestra piena, principal variation search e
+principal variation search con finestre di aspirazione; mtdf confronta alpha-beta e MTD(f),
+sia con iterative deepening sia alla sola profondità finale. quiescence confronta la ricerca con e
+senza ricerca di quiescenza sulle catture: i valori qui cambiano, quindi misura anche quanto spesso
+la mossa scelta a profondità minore coincide con quella della ricerca alla profondità data.
+lmr confronta la ricerca con e senza late-move reductions: nodi alla stessa profondità, riduzioni
+e ripetizioni per profondità, mosse uguali alla ricerca completa e profondità raggiunta nel tempo dato.
+smp misura la ricerca parallela di parallelSearch con 1, 2, 4 e 8 processi, con lo stesso tempo per
+posizione: nodi al secondo di tutti i processi, profondità media raggiunta e mosse uguali a quelle
+della ricerca con un solo processo. Con più processi che core i nodi al secondo non crescono.
+"""
+import argparse
+import math
+import os
+import random
+import time
+
+import CephalopodGame
+import playerCephalopod
+import playingStrategies_Gallo_Mari
+import parallelSearch
+import playingStrategies_euristica1
+import searchEngine
+
+
+class CountingGame(CephalopodGame.CephalopodGame):
+    """CephalopodGame che conta i nodi generati dalla ricerca (chiamate a result e make_move)."""
+
+    def __init__(self, size=5, first_player="Blue"):
+        super().__init__(size, first_player)
+        self.nodes = 0
+
+    def result(self, state, move):
+        self.nodes += 1
+        return super().result(state, move)
+
+    def make_move(self, state, move):
+        self.nodes += 1
+        return super().make_move(state, move)
+
+
+def mean_depth(depths):
+    """Profondità media delle ricerche non risolte (le posizioni risolte hanno profondità infinita)."""
+    finite = [d for d in depths if d != math.inf]
+    return sum(finite) / len(finite) if finite else math.inf
+
+
+def sample_positions(game, n_games=20, seed=0, fractions=(0.25, 0.5, 0.75)):
+    """Posizioni non terminali prese da partite casuali, a frazioni fissate della loro lunghezza."""
+    rnd = random.Random(seed)
+    positions = []
+    for _ in range(n_games):
+        history = [game.initial]
+        while not game.is_terminal(history[-1]):
+            history.append(game.result(history[-1], rnd.choice(game.actions(history[-1]))))
+        positions.extend(history[int(f * (len(history) - 1))] for f in fractions)
+    return positions
+
+
+def latency(fn, positions, repeat=3):
+    """Tempo medio per chiamata di fn(state) in microsecondi (il migliore su repeat ripetizioni)."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for state in positions:
+            fn(state)
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / len(positions)
+
+
+def operations(game):
+    """Operazioni misurate, come coppie (nome, funzione dello stato)."""
+    def make_unmake(state):
+        state = state.copy()
+        for move in game.actions(state)[:4]:
+            game.unmake_move(state, game.make_move(state, move))
+
+    return [
+        ("actions", game.actions),
+        ("count_actions", game.count_actions),
+        ("iter_actions(captures)", lambda state: list(game.iter_actions(state, "captures"))),
+        ("actions_encoded", game.actions_encoded),
+        ("result", lambda state: game.result(state, game.actions(state)[0])),
+        ("make+unmake x4", make_unmake),
+        ("is_terminal", game.is_terminal),
+        ("count", lambda state: state.count("Blue")),
+        ("canonical", game.canonical),
+        ("h Gallo_Mari", lambda state: playingStrategies_Gallo_Mari.h(game, state, "Blue")),
+        ("h euristica1", lambda state: playingStrategies_euristica1.h(game, state, "Blue")),
+        ("cephalopod_heuristic", lambda state: playerCephalopod.cephalopod_heuristic(state, "Blue")),
+    ]
+
+
+def search_rate(game, positions, depth):
+    """Nodi al secondo di h_alphabeta_search (Gallo_Mari) alla profondità depth."""
+    game.nodes = 0
+    start = time.perf_counter()
+    for state in positions:
+        playingStrategies_Gallo_Mari.h_alphabeta_search(game, state, playingStrategies_Gallo_Mari.cutoff_depth(depth))
+    elapsed = time.perf_counter() - start
+    return game.nodes / elapsed, game.nodes / len(positions)
+
+
+def growth_exponent(values, sizes):
+    """Esponente k tale che il valore cresce come (numero di celle) ** k tra la prima e l'ultima dimensione."""
+    if len(sizes) < 2 or values[0] <= 0:
+        return math.nan
+    return math.log(values[-1] / values[0]) / math.log(sizes[-1] ** 2 / sizes[0] ** 2)
+
+
+def scaling(sizes, depth, n_games, search_positions):
+    games = {size: CountingGame(size) for size in sizes}
+    positions = {size: sample_positions(games[size], n_games) for size in sizes}
+    names = [name for name, _ in operations(games[sizes[0]])]
+    results = {name: [] for name in names}
+    for size in sizes:
+        for name, fn in operations(games[size]):
+            results[name].append(latency(fn, positions[size]))
+
+    header = "%-24s" % "operazione (us)" + "".join("%12s" % ("%dx%d" % (s, s)) for s in sizes) + "%12s" % "esponente"
+    print(header)
+    print("-" * len(header))
+    for name in names:
+        values = results[name]
+        print("%-24s" % name + "".join("%12.2f" % v for v in values) + "%12.2f" % growth_exponent(values, sizes))
+
+    print()
+    print("%-24s" % ("ricerca (profondità %d)" % depth) + "%14s%14s" % ("nodi/s", "nodi/mossa"))
+    for size in sizes:
+        rate, per_move = search_rate(games[size], positions[size][:search_positions], depth)
+        print("%-24s%14.0f%14.0f" % ("%dx%d" % (size, size), rate, per_move))
+
+
+# Configurazioni di MoveOrdering confrontate da ordering, dalla più semplice alla completa
+ORDERINGS = [
+    ("ordine della board", dict(captures=False, killers=False, history=False)),
+    ("catture per pip", dict(killers=False, history=False)),
+    ("+ killer", dict(history=False)),
+    ("+ killer + history", dict()),
+]
+
+
+def compare_searches(size, depth, n_games, n_positions, configurations, title, check_values=True):
+    """Esegue iterative_deepening_search fino a depth sulle stesse posizioni per ogni configurazione
+    (nome, funzione che restituisce gli argomenti keyword della ricerca) e stampa una riga per ciascuna."""
+    game = CephalopodGame.CephalopodGame(size)
+    positions = sample_positions(game, n_games)[:n_positions]
+    h = playingStrategies_Gallo_Mari.Evaluator()
+    header = "%-22s%10s%10s%10s%12s%14s%12s" % (title, "nodi", "tempo (s)", "tagli", "prima mossa", "indice medio",
+                                                "ripetizioni")
+    print(header)
+    print("-" * len(header))
+    reference = None
+    for name, options in configurations:
+        stats = searchEngine.SearchStats()
+        values = []
+        start = time.perf_counter()
+        for state in positions:
+            tt = searchEngine.TranspositionTable()
+            v, _, _ = searchEngine.iterative_deepening_search(game, state, h, math.inf, tt, depth, stats, **options())
+            values.append(v)
+        elapsed = time.perf_counter() - start
+        # Le configurazioni cambiano solo il lavoro della ricerca, non il valore minimax
+        if reference is None:
+            reference = values
+        elif check_values and any(abs(a - b) > 1e-9 for a, b in zip(values, reference)):
+            print("attenzione: valori diversi con", name)
+        print("%-22s%10d%10.2f%10.3f%12.3f%14.2f%12d" % (name, stats.nodes, elapsed, stats.cutoff_rate(),
+                                                        stats.first_move_rate(), stats.mean_cutoff_index(),
+                                                        stats.researches + stats.aspiration_fails + stats.mtdf_passes))
+
+
+def ordering(size, depth, n_games, n_positions):
+    configurations = [(name, lambda options=options: dict(ordering=searchEngine.MoveOrdering(**options)))
+                      for name, options in ORDERINGS]
+    compare_searches(size, depth, n_games, n_positions, configurations, "ordinamento")
+
+
+def pvs(size, depth, n_games, n_positions, aspiration):
+    configurations = [
+        ("alpha-beta", lambda: dict()),
+        ("pvs", lambda: dict(pvs=True)),
+        ("pvs + aspirazione", lambda: dict(pvs=True, aspiration=aspiration)),
+    ]
+    compare_searches(size, depth, n_games, n_positions, configurations, "ricerca")
+
+
+def mtdf(size, depth, n_games, n_positions):
+    configurations = [
+        ("alpha-beta", lambda: dict()),
+        ("mtdf", lambda: dict(mtdf=True)),
+    ]
+    compare_searches(size, depth, n_games, n_positions, configurations, "iterative deepening")
+
+    # Ricerca diretta alla profondità finale: MTD(f) parte dalla valutazione h della posizione
+    game = CephalopodGame.CephalopodGame(size)
+    positions = sample_positions(game, n_games)[:n_positions]
+    h = playingStrategies_Gallo_Mari.Evaluator()
+    print()
+    for name, search in (("alpha-beta", searchEngine.h_alphabeta_search), ("mtdf", searchEngine.mtdf_search)):
+        stats = searchEngine.SearchStats()
+        start = time.perf_counter()
+        for state in positions:
+            search(game, state, searchEngine.cutoff_depth(depth), h, searchEngine.TranspositionTable(), stats=stats)
+        print("%-22s%10d%10.2f%12d" % ("%s, prof. %d" % (name, depth), stats.nodes,
+                                        time.perf_counter() - start, stats.mtdf_passes))
+
+
+def quiescence(size, depth, n_games, n_positions, limit):
+    configurations = [
+        ("senza quiescenza", lambda: dict()),
+        ("quiescenza (%d)" % limit, lambda: dict(quiescence=limit)),
+    ]
+    compare_searches(size, depth, n_games, n_positions, configurations, "ricerca", check_values=False)
+
+    # Stabilità: mossa scelta a profondità minore con e senza quiescenza, rispetto alla ricerca
+    # senza quiescenza a profondità depth (il riferimento)
+    game = CephalopodGame.CephalopodGame(size)
+    positions = sample_positions(game, n_games)[:n_positions]
+    h = playingStrategies_Gallo_Mari.Evaluator()
+    reference = [searchEngine.h_alphabeta_search(game, state, searchEngine.cutoff_depth(depth), h)[1]
+                 for state in positions]
+    print()
+    for d in range(depth):
+        for name, q in (("senza quiescenza", None), ("quiescenza (%d)" % limit, limit)):
+            moves = [searchEngine.h_alphabeta_search(game, state, searchEngine.cutoff_depth(d), h, quiescence=q)[1]
+                     for state in positions]
+            same = sum(1 for a, b in zip(moves, reference) if a == b)
+            print("%-30s mossa uguale alla profondità %d: %d/%d" % ("%s, prof. %d" % (name, d), depth, same,
+                                                                      len(positions)))
+
+
+def lmr(size, depth, n_games, n_positions, min_depth, late_moves, time_limit):
+    schedule = searchEngine.late_move_reductions(min_depth, late_moves)
+    configurations = [
+        ("senza riduzioni", lambda: dict()),
+        ("late-move reductions", lambda: dict(lmr=schedule)),
+    ]
+    compare_searches(size, depth, n_games, n_positions, configurations, "ricerca", check_values=False)
+
+    game = CephalopodGame.CephalopodGame(size)
+    positions = sample_positions(game, n_games)[:n_positions]
+    h = playingStrategies_Gallo_Mari.Evaluator()
+    stats = searchEngine.SearchStats()
+    same = 0
+    for state in positions:
+        full = searchEngine.h_alphabeta_search(game, state, searchEngine.cutoff_depth(depth), h)[1]
+        reduced = searchEngine.h_alphabeta_search(game, state, searchEngine.cutoff_depth(depth), h, stats=stats,
+                                                  lmr=schedule)[1]
+        same += full == reduced
+    print()
+    print("mossa uguale alla ricerca senza riduzioni: %d/%d" % (same, len(positions)))
+    print(stats.reductions_report())
+
+    print()
+    for name, options in configurations:
+        depths = [searchEngine.iterative_deepening_search(game, state, h, time_limit, **options())[2]
+                  for state in positions]
+        print("%-22s profondità media in %.1f s: %.2f (%d risolte)" % (name, time_limit, mean_depth(depths),
+                                                                        depths.count(math.inf)))
+
+
+def smp(size, n_games, n_positions, workers, time_limit):
+    game = CephalopodGame.CephalopodGame(size)
+    positions = sample_positions(game, n_games)[:n_positions]
+    print("%d core disponibili" % os.cpu_count())
+    header = "%-10s%12s%14s%16s" % ("processi", "nodi/s", "profondità", "mossa uguale")
+    print(header)
+    print("-" * len(header))
+    reference = None
+    for n in workers:
+        search = parallelSearch.ParallelSearch(playingStrategies_Gallo_Mari.Evaluator(), n)
+        stats = searchEngine.SearchStats()
+        moves, depths = [], []
+        start = time.perf_counter()
+        for state in positions:
+            # Ogni posizione parte dalla tabella vuota, come con un solo processo
+            search.table.clear()
+            _, move, depth = search.search(game, state, time_limit, stats)
+            moves.append(move)
+            depths.append(depth)
+        elapsed = time.perf_counter() - start
+        search.close()
+        if reference is None:
+            reference = moves
+        print("%-10d%12.0f%14.2f%16s" % (n, stats.nodes / elapsed, mean_depth(depths),
+                                         "%d/%d" % (sum(a == b for a, b in zip(moves, reference)), len(moves))))
+
+
+def add_search_arguments(parser):
+    """Argomenti comuni ai confronti tra ricerche."""
+    parser.add_argument("--size", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=3, help="profondità (cutoff_depth) dell'ultima iterazione")
+    parser.add_argument("--games", type=int, default=5, help="partite casuali da cui prendere le posizioni")
+    parser.add_argument("--positions", type=int, default=12, help="posizioni su cui misurare la ricerca")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del motore di Cephalopod")
+    commands = parser.add_subparsers(dest="command", required=True)
+    scaling_parser = commands.add_parser("scaling", help="latenza delle operazioni e nodi/s al variare della dimensione")
+    scaling_parser.add_argument("--sizes", type=int, nargs="+", default=[5, 7, 9])
+    scaling_parser.add_argument("--depth", type=int, default=2, help="profondità di h_alphabeta_search")
+    scaling_parser.add_argument("--games", type=int, default=20, help="partite casuali da cui prendere le posizioni")
+    scaling_parser.add_argument("--search-positions", type=int, default=6, help="posizioni su cui misurare la ricerca")
+    ordering_parser = commands.add_parser("ordering", help="nodi e tagli beta dei diversi ordinamenti delle mosse")
+    add_search_arguments(ordering_parser)
+    pvs_parser = commands.add_parser("pvs", help="nodi di alpha-beta e principal variation search alla stessa profondità")
+    add_search_arguments(pvs_parser)
+    mtdf_parser = commands.add_parser("mtdf", help="nodi di alpha-beta e MTD(f) alla stessa profondità")
+    add_search_arguments(mtdf_parser)
+    quiescence_parser = commands.add_parser("quiescence", help="ricerca con e senza quiescenza sulle catture")
+    add_search_arguments(quiescence_parser)
+    quiescence_parser.add_argument("--limit", type=int, default=4, help="semimosse massime di quiescenza")
+    lmr_parser = commands.add_parser("lmr", help="ricerca con e senza late-move reductions")
+    add_search_arguments(lmr_parser)
+    lmr_parser.add_argument("--min-depth", type=int, default=3, help="profondità residua minima per ridurre")
+    lmr_parser.add_argument("--late-moves", type=int, default=3, help="mosse iniziali mai ridotte")
+    lmr_parser.add_argument("--time", type=float, default=2.5, help="tempo per mossa della ricerca a tempo")
+    smp_parser = commands.add_parser("smp", help="ricerca parallela con diversi numeri di processi")
+    smp_parser.add_argument("--size", type=int, default=5)
+    smp_parser.add_argument("--games", type=int, default=5, help="partite casuali da cui prendere le posizioni")
+    smp_parser.add_argument("--positions", type=int, default=12, help="posizioni su cui misurare la ricerca")
+    smp_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="numeri di processi")
+    smp_parser.add_argument("--time", type=float, default=2.5, help="tempo per posizione")
+    pvs_parser.add_argument("--aspiration", type=float, default=2.0, help="semiampiezza della finestra di aspirazione")
+    args = parser.parse_args(argv)
+
+    if args.command == "scaling":
+        scaling(args.sizes, args.depth, args.games, args.search_positions)
+    elif args.command == "ordering":
+        ordering(args.size, args.depth, args.games, args.positions)
+    elif args.command == "pvs":
+        pvs(args.size, args.depth, args.games, args.positions, args.aspiration)
+    elif args.command == "mtdf":
+        mtdf(args.size, args.depth, args.games, args.positions)
+    elif args.command == "quiescence":
+        quiescence(args.size, args.depth, args.games, args.positions, args.limit)
+    elif args.command == "lmr":
+        lmr(args.size, args.depth, args.games, args.positions, args.min_depth, args.late_moves, args.time)
+    elif args.command == "smp":
+        smp(args.size, args.games, args.positions, args.workers, args.time)
+
+
+if __name__ == "__main__":
+    main()
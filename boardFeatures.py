@@ -0,0 +1,120 @@
+"""Caratteristiche delle euristiche di Cephalopod aggiornate in modo incrementale.
+
+Le euristiche di playingStrategies_Gallo_Mari e playingStrategies_euristica usano, oltre ai
+contatori della board (celle e pip, a costo costante), il bonus centrale e le minacce di ogni
+giocatore. BoardFeatures li calcola da zero sulla radice di una ricerca e poi li aggiorna a ogni
+mossa guardando solo le celle cambiate e i loro vicini: h_alphabeta_search di searchEngine chiama
+reset sulla radice, make prima di ogni game.make_move e unmake dopo ogni game.unmake_move.
+Le caratteristiche appartengono così alla valutazione e non alla board, che tiene solo i contatori
+del gioco.
+"""
+# Codifica delle celle di CephalopodGame.Board: pip nei bit bassi, RED_FLAG per le celle Red.
+# Le costanti e le tabelle sono ricalcolate qui dalla dimensione della board: importare
+# CephalopodGame da questo modulo, che i giocatori importano, caricherebbe una seconda volta
+# la GUI quando viene eseguita come script (con due classi Board diverse).
+PIP_MASK = 7
+RED_FLAG = 8
+
+# Tabelle dei vicini: per ogni indice di cella r * size + c, gli indici delle celle adiacenti
+# ortogonalmente dentro la board.
+_neighbour_tables = {}
+
+def neighbour_table(size):
+    table = _neighbour_tables.get(size)
+    if table is None:
+        table = tuple(tuple(nr * size + nc for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1))
+                            if 0 <= nr < size and 0 <= nc < size)
+                      for r in range(size) for c in range(size))
+        _neighbour_tables[size] = table
+    return table
+
+# Tabelle dei bonus centrali: per ogni indice di cella, 3 meno la distanza di Manhattan dal centro
+# (size // 2, size // 2), se positivo, altrimenti 0.
+_center_tables = {}
+
+def center_table(size):
+    table = _center_tables.get(size)
+    if table is None:
+        center = size // 2
+        table = tuple(max(0, 3 - abs(r - center) - abs(c - center)) for r in range(size) for c in range(size))
+        _center_tables[size] = table
+    return table
+
+
+class BoardFeatures:
+    """Bonus centrale e minacce della posizione seguita dalla ricerca.
+    values contiene [bonus centrale Blue, bonus centrale Red, minacce a Blue, minacce a Red];
+    le minacce a un giocatore sono le coppie (sua cella con pip al massimo 5, cella avversaria
+    adiacente). stack conserva i valori delle posizioni precedenti, ripristinati da unmake.
+    Una ricerca alla volta: ogni contesto di ricerca ha la sua istanza.
+    I valori valgono solo per la posizione seguita, l'oggetto state passato a reset e poi
+    modificato da make_move/unmake_move: follows dice se uno stato è quella posizione."""
+
+    def __init__(self, state=None):
+        self.values = [0, 0, 0, 0]
+        self.stack = []
+        self.state = None
+        if state is not None:
+            self.reset(state)
+
+    def reset(self, state):
+        """Calcola da zero le caratteristiche di state, che diventa la posizione seguita."""
+        self.pip_mask, self.red_flag = PIP_MASK, RED_FLAG
+        self.neighbours, self.bonus = neighbour_table(state.size), center_table(state.size)
+        self.state = state
+        values = [0, 0, 0, 0]
+        cells = state.cells
+        for i, code in enumerate(cells):
+            if code:
+                owner = code >> 3
+                values[owner] += self.bonus[i]
+                if code & self.pip_mask <= 5:
+                    values[2 + owner] += sum(1 for k in self.neighbours[i]
+                                             if cells[k] and (cells[k] ^ code) & self.red_flag)
+        self.values = values
+        self.stack = []
+
+    def _update(self, cells, i, code, sign, skip=()):
+        """Aggiunge (sign = 1) o toglie (sign = -1) il bonus centrale della cella i occupata con
+        code e le minacce tra questa e i suoi vicini occupati, esclusi quelli in skip."""
+        values = self.values
+        pip_mask = self.pip_mask
+        owner = code >> 3
+        values[owner] += sign * self.bonus[i]
+        exposed = code & pip_mask <= 5
+        for k in self.neighbours[i]:
+            other = cells[k]
+            if other and (other ^ code) & self.red_flag and k not in skip:
+                if exposed:
+                    values[2 + owner] += sign
+                if other & pip_mask <= 5:
+                    values[2 + (other >> 3)] += sign
+
+    def make(self, state, move):
+        """Da chiamare prima di game.make_move(state, move)."""
+        self.stack.append(self.values[:])
+        cells = state.cells
+        n = state.size
+        (r, c), pip, captured = move
+        # Le celle catturate sono vicine della cella della mossa, che è vuota, e non sono vicine
+        # tra loro: si tolgono una alla volta dalla posizione prima della mossa
+        removed = [rr * n + cc for rr, cc in captured]
+        for j in removed:
+            self._update(cells, j, cells[j], -1)
+        self._update(cells, r * n + c, (self.red_flag if state.to_move == "Red" else 0) | pip, 1, removed)
+
+    def unmake(self):
+        """Da chiamare dopo game.unmake_move: ripristina le caratteristiche della posizione precedente."""
+        self.values = self.stack.pop()
+
+    def follows(self, state):
+        """Vero se state è la posizione seguita (vedi reset)."""
+        return state is self.state
+
+    def center_control(self, player):
+        """Somma dei bonus centrali delle celle di player (vedi center_table)."""
+        return self.values[player == "Red"]
+
+    def threats(self, player):
+        """Minacce a player: coppie (cella di player con pip al massimo 5, cella avversaria adiacente)."""
+        return self.values[2 + (player == "Red")]
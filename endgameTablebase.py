@@ -0,0 +1,203 @@
+"""Tablebase dei finali di Cephalopod.
+
+Uso:
+    python endgameTablebase.py [--size 5] [--empty 3] [--games 500] [--time 2] [--workers 4]
+
+Enumerare tutte le posizioni con al massimo K celle vuote non è fattibile: sulla 5x5 sono miliardi
+e, poiché le catture svuotano di nuovo le celle, molte nascondono ancora una partita lunga.
+Il generatore quindi raccoglie le posizioni con al massimo K celle vuote che compaiono in partite
+casuali (con seme fissato), le porta nella forma canonica rispetto alle simmetrie della board e le
+risolve con searchEngine.solve_endgame, con un tempo massimo per posizione. I processi di lavoro
+sono --workers.
+
+Ogni risultato viene aggiunto subito al file journal (endgame_5x5.bin.journal): se la generazione
+viene interrotta, rilanciandola con gli stessi parametri le posizioni già tentate vengono saltate.
+Alla fine i risultati risolti vengono scritti ordinati per chiave nel file endgame_5x5.bin, record
+di dimensione fissa (chiave canonica, mossa codificata nella forma canonica, valore), che
+Tablebase mappa in memoria e interroga con una ricerca binaria.
+"""
+import argparse
+import glob
+import mmap
+import multiprocessing
+import os
+import random
+import struct
+import time
+
+import searchEngine
+
+# Record del file: chiave canonica (64 bit), mossa codificata con encode_move, valore (WIN, DRAW, LOSS)
+RECORD = struct.Struct("<QIb3x")
+# Valore del journal per le posizioni che il risolutore non ha finito in tempo
+UNSOLVED = 2
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def tablebase_path(size, directory=DIRECTORY):
+    return os.path.join(directory, "endgame_%dx%d.bin" % (size, size))
+
+
+class Tablebase:
+    """Le tablebase di tutte le dimensioni presenti in directory, mappate in memoria.
+    Se non ci sono file, lookup restituisce sempre None."""
+
+    def __init__(self, directory=DIRECTORY):
+        self.maps = {}
+        for path in glob.glob(os.path.join(directory, "endgame_*x*.bin")):
+            size = int(os.path.basename(path)[len("endgame_"):].split("x")[0])
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size >= RECORD.size:
+                    self.maps[size] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return sum(len(m) // RECORD.size for m in self.maps.values())
+
+    def probe(self, size, key):
+        """Restituisce (mossa codificata, valore) per la chiave canonica, oppure None."""
+        data = self.maps.get(size)
+        if data is None:
+            return None
+        lo, hi = 0, len(data) // RECORD.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k, move, value = RECORD.unpack_from(data, mid * RECORD.size)
+            if k == key:
+                return move, value
+            if k < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def lookup(self, game, state):
+        """Valore esatto (WIN, DRAW o LOSS per il giocatore di turno) e mossa migliore di state,
+        oppure None se la posizione non è nella tablebase."""
+        if state.size not in self.maps:
+            return None
+        key, t = game.canonical(state)
+        entry = self.probe(state.size, key)
+        if entry is None:
+            return None
+        move, value = entry
+        # La mossa è memorizzata nella forma canonica: la si riporta sullo stato
+        return value, game.inverse_transform_move(game.decode_move(move), t)
+
+
+_shared = None
+
+
+def shared_tablebase():
+    """Le tablebase della directory del modulo, mappate una volta sola e condivise dai contesti di ricerca."""
+    global _shared
+    if _shared is None:
+        _shared = Tablebase()
+    return _shared
+
+
+def sample_positions(game, max_empty, n_games, seed=0):
+    """Posizioni non terminali con al massimo max_empty celle vuote nelle partite casuali
+    1..n_games (ognuna con il proprio seme), come dizionario chiave canonica -> stato canonico."""
+    positions = {}
+    for i in range(n_games):
+        rnd = random.Random("%s-%d" % (seed, i))
+        state = game.initial
+        while not game.is_terminal(state):
+            if state.count_empty() <= max_empty:
+                key, t = game.canonical(state)
+                if key not in positions:
+                    positions[key] = game.transform_state(state, t)
+            state = game.result(state, rnd.choice(game.actions(state)))
+    return positions
+
+
+_worker_game = None
+
+
+def _init_worker(size):
+    global _worker_game
+    import CephalopodGame
+    _worker_game = CephalopodGame.CephalopodGame(size)
+
+
+def _solve(job):
+    """Risolve una posizione canonica nel processo di lavoro: restituisce (chiave, mossa codificata, valore)."""
+    key, cells, to_move, time_limit = job
+    import CephalopodGame
+    state = CephalopodGame.Board(_worker_game.size, bytearray(cells), to_move)
+    try:
+        value, move = searchEngine.solve_endgame(_worker_game, state, deadline=time.perf_counter() + time_limit)
+    except searchEngine.SearchTimeout:
+        return key, 0, UNSOLVED
+    return key, _worker_game.encode_move(move), value
+
+
+def read_journal(path):
+    """Record (chiave, mossa, valore) già presenti nel journal, per chiave. Un record troncato
+    alla fine (interruzione durante la scrittura) viene ignorato."""
+    done = {}
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            data = f.read()
+        for offset in range(0, len(data) - RECORD.size + 1, RECORD.size):
+            key, move, value = RECORD.unpack_from(data, offset)
+            done[key] = (move, value)
+    return done
+
+
+def write_tablebase(path, records):
+    """Scrive i record risolti ordinati per chiave."""
+    with open(path + ".tmp", "wb") as f:
+        for key in sorted(records):
+            move, value = records[key]
+            if value != UNSOLVED:
+                f.write(RECORD.pack(key, move, value))
+    os.replace(path + ".tmp", path)
+
+
+def generate(size=5, max_empty=3, n_games=500, time_limit=2.0, workers=None, seed=0, directory=DIRECTORY,
+             verbose=True):
+    import CephalopodGame
+    game = CephalopodGame.CephalopodGame(size)
+    path = tablebase_path(size, directory)
+    journal = path + ".journal"
+    done = read_journal(journal)
+    # Un record troncato viene scartato prima di riprendere ad aggiungere
+    with open(journal, "ab") as f:
+        f.truncate(len(done) * RECORD.size)
+    positions = sample_positions(game, max_empty, n_games, seed)
+    jobs = [(key, bytes(state.cells), state.to_move, time_limit) for key, state in positions.items()
+            if key not in done]
+    if verbose:
+        print("%d posizioni, %d già nel journal, %d da risolvere" % (len(positions), len(positions) - len(jobs),
+                                                                     len(jobs)))
+    start = time.perf_counter()
+    with open(journal, "ab") as f, multiprocessing.Pool(workers, _init_worker, (size,)) as pool:
+        for n, (key, move, value) in enumerate(pool.imap_unordered(_solve, jobs), 1):
+            f.write(RECORD.pack(key, move, value))
+            f.flush()
+            done[key] = (move, value)
+            if verbose and n % 50 == 0:
+                print("%d/%d posizioni in %.0f s" % (n, len(jobs), time.perf_counter() - start))
+    write_tablebase(path, done)
+    if verbose:
+        solved = sum(1 for _, value in done.values() if value != UNSOLVED)
+        print("%s: %d posizioni risolte su %d" % (path, solved, len(done)))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generazione della tablebase dei finali di Cephalopod")
+    parser.add_argument("--size", type=int, default=5)
+    parser.add_argument("--empty", type=int, default=3, help="numero massimo di celle vuote delle posizioni")
+    parser.add_argument("--games", type=int, default=500, help="partite casuali da cui prendere le posizioni")
+    parser.add_argument("--time", type=float, default=2.0, help="tempo massimo del risolutore per posizione")
+    parser.add_argument("--workers", type=int, default=None, help="processi di lavoro (default: tutti i core)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    generate(args.size, args.empty, args.games, args.time, args.workers, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Libro delle aperture di Cephalopod.
+
+Uso:
+    python openingBook.py [--strategy playingStrategies_Gallo_Mari] [--size 5] [--plies 4] [--games 50]
+                          [--time 2] [--explore 0.3]
+
+Ogni partita parte dalla stessa board vuota, quindi le prime mosse si possono calcolare una volta
+sola. Il costruttore gioca partite contro se stesso per le prime --plies semimosse: per ogni
+posizione incontrata la prima volta esegue una ricerca profonda (iterative deepening del modulo
+--strategy per --time secondi) sulla forma canonica della posizione (sulle board
+pari, dove le euristiche non sono simmetriche, sulla posizione stessa); poi gioca la
+mossa del libro oppure, con probabilità --explore, una mossa casuale, così che le partite successive
+raggiungano posizioni diverse.
+
+Le mosse del libro sono quelle dell'euristica della strategia, quindi ogni strategia ha il suo
+file: opening_playingStrategies_Gallo_Mari_5x5.bin contiene un record di dimensione fissa per
+posizione, ordinato per chiave:
+chiave canonica, mossa nella forma canonica (codificata con encode_move), numero di volte in cui la
+posizione è stata raggiunta, valore e profondità della ricerca. Rilanciando il costruttore il libro
+esistente viene esteso: le posizioni già presenti non vengono cercate di nuovo.
+"""
+import argparse
+import glob
+import importlib
+import math
+import os
+import random
+import re
+import struct
+import time
+
+import searchEngine
+
+# Record del file: chiave canonica, mossa codificata, visite, valore della ricerca, profondità della ricerca
+RECORD = struct.Struct("<QIIfH2x")
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def position_key(game, state):
+    """(chiave, t) con cui la posizione è memorizzata nel libro. Le ricerche del libro usano le
+    euristiche, simmetriche solo sulle board dispari: sulle board pari le posizioni equivalenti per
+    simmetria non vengono unite e la chiave è quella di Zobrist dello stato (t = 0, l'identità)."""
+    if searchEngine.symmetric_heuristics(state.size):
+        return game.canonical(state)
+    return state.key, 0
+
+
+def book_path(strategy, size, directory=DIRECTORY):
+    return os.path.join(directory, "opening_%s_%dx%d.bin" % (strategy, size, size))
+
+
+def read_book(path):
+    """Voci del file come dizionario chiave -> [mossa, visite, valore, profondità]."""
+    entries = {}
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            data = f.read()
+        for key, move, visits, value, depth in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+            entries[key] = [move, visits, value, depth]
+    return entries
+
+
+def write_book(path, entries):
+    with open(path + ".tmp", "wb") as f:
+        for key in sorted(entries):
+            f.write(RECORD.pack(key, *entries[key]))
+    os.replace(path + ".tmp", path)
+
+
+class OpeningBook:
+    """I libri della strategia (il nome del modulo, per esempio "playingStrategies_Gallo_Mari") di
+    tutte le dimensioni presenti in directory, caricati in memoria.
+    Se non ci sono file, lookup restituisce sempre None."""
+
+    def __init__(self, strategy, directory=DIRECTORY):
+        self.books = {}
+        # Il nome della strategia va confrontato per intero: "playingStrategies" è un prefisso
+        # degli altri moduli
+        name = re.compile(r"opening_%s_(\d+)x\d+\.bin$" % re.escape(strategy))
+        for path in glob.glob(os.path.join(directory, "opening_*x*.bin")):
+            match = name.match(os.path.basename(path))
+            if match:
+                self.books[int(match.group(1))] = read_book(path)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.books.values())
+
+    def lookup(self, game, state):
+        """Mossa del libro per state, oppure None se la posizione non è nel libro."""
+        entries = self.books.get(state.size)
+        if not entries:
+            return None
+        key, t = position_key(game, state)
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        # La mossa è memorizzata nella forma canonica: la si riporta sullo stato
+        return game.inverse_transform_move(game.decode_move(entry[0]), t)
+
+
+def build(strategy="playingStrategies_Gallo_Mari", size=5, plies=4, n_games=50, time_limit=2.0, explore=0.3, seed=0,
+          directory=DIRECTORY, verbose=True):
+    import CephalopodGame
+    context = importlib.import_module(strategy).new_context()
+    game = CephalopodGame.CephalopodGame(size)
+    path = book_path(strategy, size, directory)
+    entries = read_book(path)
+    rnd = random.Random(seed)
+    searched = 0
+    start = time.perf_counter()
+    for i in range(n_games):
+        state = game.initial
+        for _ in range(plies):
+            if game.is_terminal(state):
+                break
+            key, t = position_key(game, state)
+            entry = entries.get(key)
+            if entry is None:
+                value, move, depth = context.iterative_deepening_search(game, game.transform_state(state, t),
+                                                                        time_limit)
+                entry = entries[key] = [game.encode_move(move), 0, value if value is not None else math.nan,
+                                        min(max(depth, 0), 0xFFFF)]
+                searched += 1
+            entry[1] += 1
+            if rnd.random() < explore:
+                moves = game.unique_actions(state) if searchEngine.symmetric_heuristics(size) else game.actions(state)
+                move = rnd.choice(moves)
+            else:
+                move = game.inverse_transform_move(game.decode_move(entry[0]), t)
+            state = game.result(state, move)
+        # Il libro viene salvato dopo ogni partita, così un'interruzione non perde le ricerche fatte
+        write_book(path, entries)
+        if verbose:
+            print("partita %d/%d: %d posizioni nel libro, %d ricerche in %.0f s"
+                  % (i + 1, n_games, len(entries), searched, time.perf_counter() - start))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Costruzione del libro delle aperture di Cephalopod")
+    parser.add_argument("--strategy", default="playingStrategies_Gallo_Mari",
+                        help="modulo della strategia che cerca le mosse del libro")
+    parser.add_argument("--size", type=int, default=5)
+    parser.add_argument("--plies", type=int, default=4, help="semimosse di ogni partita coperte dal libro")
+    parser.add_argument("--games", type=int, default=50, help="partite giocate dal costruttore")
+    parser.add_argument("--time", type=float, default=2.0, help="tempo di ricerca per posizione")
+    parser.add_argument("--explore", type=float, default=0.3, help="probabilità di giocare una mossa casuale")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    build(args.strategy, args.size, args.plies, args.games, args.time, args.explore, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Ricerca parallela (Lazy SMP) di Cephalopod.
+
+Per il GIL i thread non velocizzano la ricerca: ParallelSearch usa invece processi di lavoro.
+Tutti i processi eseguono iterative_deepening_search sulla stessa posizione fino alla stessa
+scadenza e condividono una tabella delle trasposizioni in multiprocessing.shared_memory: ognuno
+trova nella tabella i risultati degli altri, quindi le ricerche si dividono il lavoro senza
+coordinarsi. I processi di lavoro dispari partono dalla profondità 1, così non cercano in
+sincronia con gli altri. Alla scadenza si sceglie il risultato della ricerca più profonda.
+
+La tabella ha slot di tre parole da 64 bit: chiave, valore, dati (mossa nei bit 0-15, profondità
+nei bit 16-31, limite nei bit 32-39, generazione nei bit 40-62, bit 63 di validità). La generazione
+avanza a ogni iterazione e a ogni passo di MTD(f): con 23 bit non torna a un valore già usato
+prima di milioni di ricerche, così le voci vecchie restano riconoscibili dalla politica di sostituzione. I processi scrivono senza lock: la prima parola contiene la chiave in xor con le
+altre due, così una voce scritta a metà da due processi non corrisponde più alla chiave e viene
+ignorata.
+"""
+import atexit
+import multiprocessing
+import multiprocessing.util
+import struct
+import time
+import types
+from multiprocessing import shared_memory
+
+import searchEngine
+from searchEngine import MoveOrdering, SearchStats, infinity
+
+_DOUBLE = struct.Struct("<d")
+_WORD = struct.Struct("<Q")
+
+# Profondità memorizzata per le voci esatte a qualunque profondità
+_SOLVED = 0xFFFF
+_VALID = 1 << 63
+_MOVE_MASK = 0xFFFF
+_DEPTH_SHIFT = 16
+_FLAG_SHIFT = 32
+_GENERATION_SHIFT = 40
+_GENERATION_MASK = (1 << 23) - 1
+
+
+class SharedTranspositionTable:
+    """Tabella delle trasposizioni in memoria condivisa, con la stessa interfaccia di
+    searchEngine.TranspositionTable. Senza name crea la memoria (e la libera con close);
+    con name si collega a quella creata da un altro processo.
+    Solo il processo che l'ha creata svuota la tabella e avanza la generazione, che è
+    memorizzata nella prima parola della memoria condivisa."""
+
+    def __init__(self, size=1 << 18, name=None):
+        if size & (size - 1):
+            raise ValueError("La dimensione della tabella deve essere una potenza di 2")
+        self.mask = size - 1
+        self.owner = name is None
+        n_bytes = 8 * (1 + 3 * size)
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=n_bytes)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.words = self.memory.buf[:n_bytes].cast("Q")
+        self.evaluator = None
+        self.generation = self.words[0]
+        self.probes = self.hits = self.stores = 0
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def __len__(self):
+        words = self.words
+        return sum(1 for i in range(3, len(words), 3) if words[i] & _VALID)
+
+    def clear(self):
+        self.words[1:] = memoryview(bytes(8 * (len(self.words) - 1))).cast("Q")
+        self.probes = self.hits = self.stores = 0
+
+    def new_search(self, evaluator=None):
+        """Come TranspositionTable.new_search. Il primo elemento di evaluator, la valutazione,
+        viene ridotto a evaluator_key: il processo chiamante cerca con l'evaluator del suo
+        contesto, un'altra istanza della stessa classe, e non deve svuotare la tabella in cui
+        i processi di lavoro stanno già scrivendo."""
+        if isinstance(evaluator, tuple) and evaluator:
+            evaluator = (evaluator_key(evaluator[0]),) + evaluator[1:]
+        if self.owner:
+            if evaluator != self.evaluator:
+                self.clear()
+                self.evaluator = evaluator
+            self.words[0] = (self.words[0] + 1) & _GENERATION_MASK
+        self.generation = self.words[0]
+
+    def _read(self, key):
+        i = 1 + 3 * (key & self.mask)
+        check, score, data = self.words[i:i + 3]
+        if data & _VALID and check ^ score ^ data == key:
+            return score, data
+        return None
+
+    def probe(self, key):
+        """Restituisce (profondità, limite, valore, mossa) per la chiave, oppure None."""
+        self.probes += 1
+        entry = self._read(key)
+        if entry is None:
+            return None
+        self.hits += 1
+        score, data = entry
+        depth = (data >> _DEPTH_SHIFT) & 0xFFFF
+        return (infinity if depth == _SOLVED else depth - 1, (data >> _FLAG_SHIFT) & 0xFF,
+                _DOUBLE.unpack(_WORD.pack(score))[0], data & _MOVE_MASK)
+
+    def store(self, key, depth, flag, score, move):
+        i = 1 + 3 * (key & self.mask)
+        words = self.words
+        old = words[i + 2]
+        if (old & _VALID and words[i] ^ words[i + 1] ^ old != key
+                and (old >> _GENERATION_SHIFT) & _GENERATION_MASK == self.generation):
+            old_depth = (old >> _DEPTH_SHIFT) & 0xFFFF
+            if depth != infinity and (old_depth == _SOLVED or depth + 1 < old_depth):
+                return
+        data = (_VALID | self.generation << _GENERATION_SHIFT | flag << _FLAG_SHIFT
+                | (_SOLVED if depth == infinity else depth + 1) << _DEPTH_SHIFT | move)
+        score = _WORD.unpack(_DOUBLE.pack(score))[0]
+        words[i + 1] = score
+        words[i + 2] = data
+        words[i] = key ^ score ^ data
+        self.stores += 1
+
+    def best_move(self, key):
+        """Mossa codificata memorizzata per la chiave, oppure None."""
+        entry = self._read(key)
+        return entry[1] & _MOVE_MASK if entry is not None else None
+
+    def close(self):
+        self.words.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+# Stato dei processi di lavoro, inizializzato da _init_worker
+_worker_table = None
+_worker_h = None
+_worker_ordering = None
+_worker_games = {}
+
+
+def _init_worker(name, size, h):
+    global _worker_table, _worker_h, _worker_ordering
+    _worker_table = SharedTranspositionTable(size, name)
+    # Il processo di lavoro si scollega dalla memoria condivisa quando termina
+    multiprocessing.util.Finalize(None, _worker_table.close, exitpriority=10)
+    _worker_h = h
+    _worker_ordering = MoveOrdering()
+
+
+def _search(job):
+    """Iterative deepening nel processo di lavoro per time_limit secondi: restituisce
+    (valore, mossa codificata, profondità, nodi)."""
+    import CephalopodGame
+    size, cells, to_move, time_limit, start_depth, pvs, quiescence = job
+    # Il tempo arriva in secondi e non come scadenza: time.perf_counter non ha lo stesso
+    # riferimento in processi diversi
+    deadline = time.perf_counter() + time_limit
+    game = _worker_games.get(size)
+    if game is None:
+        game = _worker_games[size] = CephalopodGame.CephalopodGame(size)
+    state = CephalopodGame.Board(size, bytearray(cells), to_move)
+    stats = SearchStats()
+    v, move, depth = searchEngine.iterative_deepening_search(
+        game, state, _worker_h, deadline - time.perf_counter(), _worker_table, stats=stats, ordering=_worker_ordering,
+        pvs=pvs, quiescence=quiescence, start_depth=start_depth)
+    return v, game.encode_move(move), depth, stats.nodes
+
+
+class ParallelSearch:
+    """Lazy SMP con workers processi in tutto: il processo chiamante e workers - 1 processi di
+    lavoro, avviati una volta sola e riusati da una mossa all'altra. h deve essere una funzione
+    definita al livello di un modulo, perché i processi di lavoro la ricevono per nome, oppure
+    un'istanza di una classe definita al livello di un modulo (per esempio un Evaluator delle
+    strategie): ogni processo di lavoro ne riceve una copia."""
+
+    def __init__(self, h, workers=2, tt_size=1 << 18):
+        self.h = h
+        self.workers = workers
+        self.table = SharedTranspositionTable(tt_size)
+        self.ordering = MoveOrdering()
+        self.pool = None
+        self._start_pool()
+        # La memoria condivisa va liberata anche se nessuno chiama close
+        atexit.register(self.close)
+
+    def _start_pool(self):
+        """Avvia i processi di lavoro, fermando prima quelli già avviati."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.workers > 1:
+            # spawn: un fork del processo della GUI, con i suoi thread, non è sicuro
+            context = multiprocessing.get_context("spawn")
+            self.pool = context.Pool(self.workers - 1, _init_worker, (self.table.name, self.table.mask + 1, self.h))
+
+    def search(self, game, state, time_limit=2.5, stats=None, pvs=False, quiescence=None, endgame_cells=None,
+               endgame_tt=None, tablebase=None, h=None, ordering=None):
+        """Come searchEngine.iterative_deepening_search, ma con tutti i processi: restituisce
+        (valore, mossa, profondità) del risultato più profondo. I nodi dei processi di lavoro
+        vengono aggiunti a stats.nodes. Le posizioni della tablebase e quelle con al massimo
+        endgame_cells celle vuote sono cercate dal solo processo chiamante, che valuta con h
+        (una valutazione equivalente a quella dei processi di lavoro, di default self.h) e
+        ordina le mosse con ordering (di default self.ordering)."""
+        deadline = time.perf_counter() + time_limit
+        if stats is None:
+            stats = SearchStats()
+        if h is None:
+            h = self.h
+        if ordering is None:
+            ordering = self.ordering
+        # La tabella va svuotata prima che i processi di lavoro comincino a scriverci
+        self.table.new_search((self.h, quiescence, None))
+        serial = self.pool is None or (endgame_cells is not None and state.count_empty() <= endgame_cells)
+        if tablebase is not None:
+            entry = tablebase.lookup(game, state)
+            if entry is not None:
+                return entry[0], entry[1], infinity
+        jobs = []
+        if not serial:
+            jobs = [self.pool.apply_async(_search, ((state.size, bytes(state.cells), state.to_move,
+                                                     deadline - time.perf_counter(), i % 2, pvs, quiescence),))
+                    for i in range(1, self.workers)]
+        best = searchEngine.iterative_deepening_search(
+            game, state, h, deadline - time.perf_counter(), self.table, stats=stats, ordering=ordering,
+            pvs=pvs, quiescence=quiescence, endgame_cells=endgame_cells, endgame_tt=endgame_tt)
+        late = False
+        for job in jobs:
+            try:
+                v, move, depth, nodes = job.get(max(deadline - time.perf_counter(), 0) + 1.0)
+            except multiprocessing.TimeoutError:
+                late = True
+                continue
+            stats.nodes += nodes
+            if depth > best[2]:
+                best = (v, game.decode_move(move), depth)
+        if late:
+            # Un processo in ritardo continuerebbe a scrivere nella tabella durante la ricerca
+            # successiva, che la svuota: i processi vengono fermati e riavviati
+            self._start_pool()
+        return best
+
+    def close(self):
+        atexit.unregister(self.close)
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+        self.table.close()
+
+
+def evaluator_key(h):
+    """Identità della valutazione h: la funzione stessa, oppure la classe di un evaluator incrementale
+    (ogni contesto di ricerca ne ha un'istanza, ma istanze della stessa classe valutano allo stesso modo)."""
+    return h if isinstance(h, types.FunctionType) else type(h)
+
+
+# Processi di lavoro e tabella condivisa di search, avviati dalla prima chiamata
+_searcher = None
+
+
+def search(context, game, state, time_limit=2.5, workers=4, stats=None, pvs=False, quiescence=None,
+           endgame_cells=None):
+    """Iterative deepening Lazy SMP su workers processi con l'evaluator e le tabelle dei finali di
+    context (un searchEngine.SearchContext); endgame_cells è di default quello del contesto.
+    I processi vengono avviati dalla prima chiamata e riusati finché non cambiano l'evaluator o
+    workers. Restituisce (valore, mossa, profondità) della ricerca completata più profonda."""
+    global _searcher
+    if _searcher is None or _searcher.workers != workers or evaluator_key(_searcher.h) != evaluator_key(context.h):
+        if _searcher is not None:
+            _searcher.close()
+        _searcher = ParallelSearch(context.h, workers)
+    if endgame_cells is None:
+        endgame_cells = context.endgame_cells
+    return _searcher.search(game, state, time_limit, stats, pvs, quiescence, endgame_cells, context.endgame_tt,
+                            context.tablebase, context.h, context.ordering)
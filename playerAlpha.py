@@ -1,13 +1,13 @@
 import playingStrategies_euristica
+import searchPlayer
 #import random
 #import game
 
 # The moves of player have the form (x,y), where y is the column number and x the row number (starting with 0)
 
-def playerStrategy (game,state):
-    cutOff = 4 # The depth of the search tree. It can be changed to test the performance of the player.
-    # The player uses the alphabeta search algorithm to find the best move.
-    value,move = playingStrategies_euristica.h_alphabeta_search(game,state,playingStrategies_euristica.cutoff_depth(cutOff))
-  
-    return move
-
+# The player uses iterative deepening alpha-beta with the heuristic of playingStrategies_euristica: it searches
+# deeper and deeper until the time budget (a fraction of the time-out of the move) is spent,
+# and ponders on the opponent's time (see searchPlayer.SearchPlayer).
+player = searchPlayer.SearchPlayer(playingStrategies_euristica)
+playerStrategy = player.playerStrategy
+ponder = player.ponder
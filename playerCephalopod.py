@@ -1,15 +1,13 @@
-import playingStrategies_euristica
+import searchEngine
+import searchPlayer
 import random
 
 def playerStrategy(game, state):
-    # Usa una profondità di 3 per bilanciare efficienza e qualità delle decisioni
-    cutOff = 3
-    
-    # Sostituiamo l'euristica nella libreria prima di eseguire la ricerca
-    playingStrategies_euristica.h = cephalopod_heuristic
-    
-    # Esegui la ricerca alpha-beta con la nostra euristica
-    value, move = playingStrategies_euristica.h_alphabeta_search(game, state, playingStrategies_euristica.cutoff_depth(cutOff))
+    # Iterative deepening alpha-beta con la nostra euristica, nel contesto del giocatore di turno:
+    # cerca sempre più in profondità finché non usa una frazione del time-out della mossa,
+    # così resta nei tempi anche sulle board grandi
+    value, move, depth = contexts[state.to_move].iterative_deepening_search(
+        game, state, searchPlayer.TIME_FRACTION * game.time_out)
     
     # In caso di timeout o errori, tornare a una scelta casuale
     if move is None:
@@ -17,6 +15,13 @@ def playerStrategy(game, state):
     
     return move
 
+def evaluate(game, state, player):
+    # Adatta cephalopod_heuristic(state, player) alla firma delle valutazioni di searchEngine
+    return cephalopod_heuristic(state, player)
+
+# Un contesto di ricerca per colore, con la nostra euristica e tabelle proprie
+contexts = {"Blue": searchEngine.SearchContext(evaluate), "Red": searchEngine.SearchContext(evaluate)}
+
 def cephalopod_heuristic(state, player):
     """
     Euristica per valutare uno stato del gioco Cephalopod.
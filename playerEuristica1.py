@@ -1,4 +1,5 @@
 import playingStrategies_euristica1
+import searchPlayer
 #import random
 #import game
 
@@ -6,9 +7,9 @@ import playingStrategies_euristica1
 
 #prima prova euristica semplice
 
-def playerStrategy (game,state):
-    cutOff = 3 # The depth of the search tree. It can be changed to test the performance of the player.
-    # The player uses the alphabeta search algorithm to find the best move.
-    value,move = playingStrategies_euristica1.h_alphabeta_search(game,state,playingStrategies_euristica1.cutoff_depth(cutOff))
-  
-    return move
+# The player uses iterative deepening alpha-beta with the heuristic of playingStrategies_euristica1: it searches
+# deeper and deeper until the time budget (a fraction of the time-out of the move) is spent,
+# and ponders on the opponent's time (see searchPlayer.SearchPlayer).
+player = searchPlayer.SearchPlayer(playingStrategies_euristica1)
+playerStrategy = player.playerStrategy
+ponder = player.ponder
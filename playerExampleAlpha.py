@@ -1,4 +1,5 @@
 import playingStrategies
+import searchPlayer
 #import random
 #import game
 
@@ -7,10 +8,9 @@ import playingStrategies
 
 #esempio alpha prof
 
-def playerStrategy (game,state):
-    cutOff = 3 # The depth of the search tree. It can be changed to test the performance of the player.
-    # The player uses the alphabeta search algorithm to find the best move.
-    value,move = playingStrategies.h_alphabeta_search(game,state,playingStrategies.cutoff_depth(cutOff))
-  
-    return move
-
+# The player uses iterative deepening alpha-beta with the heuristic of playingStrategies: it searches
+# deeper and deeper until the time budget (a fraction of the time-out of the move) is spent,
+# and ponders on the opponent's time (see searchPlayer.SearchPlayer).
+player = searchPlayer.SearchPlayer(playingStrategies)
+playerStrategy = player.playerStrategy
+ponder = player.ponder
@@ -1,10 +1,12 @@
 import random
 import math
 import time
+from array import array
 from collections import defaultdict
 
 class MCTSNode:
-    """Nodo dell'albero Monte Carlo ottimizzato per velocità"""
+    """Nodo dell'albero Monte Carlo ottimizzato per velocità.
+    Le mosse (move, chiavi di children, untried_moves) sono interi codificati con game.encode_move"""
     __slots__ = ('state', 'parent', 'move', 'children', 'visits', 'wins', 'untried_moves', 'player')
     
     def __init__(self, state, parent=None, move=None):
@@ -20,9 +22,10 @@ class MCTSNode:
     def get_untried_moves(self, game):
         """Inizializzazione lazy delle mosse non provate"""
         if self.untried_moves is None:
-            self.untried_moves = list(game.actions(self.state))
-            # Prioritizza le mosse di cattura durante l'esplorazione
-            self.untried_moves.sort(key=lambda m: len(m[2]), reverse=True)
+            # Prioritizza le mosse di cattura durante l'esplorazione (più celle catturate prima).
+            # L'array è invertito, così expand estrae la prossima mossa con pop() in O(1)
+            self.untried_moves = game.actions_encoded(self.state, "captures")
+            self.untried_moves.reverse()
         return self.untried_moves
     
     def has_untried_moves(self):
@@ -52,14 +55,9 @@ class MCTSNode:
         return best_node
     
     def add_child(self, move, state):
-        """Versione semplificata per velocità"""
+        """Versione semplificata per velocità (la mossa è già stata estratta da untried_moves)"""
         child = MCTSNode(state, self, move)
         self.children[move] = child
-        if self.untried_moves:
-            try:
-                self.untried_moves.remove(move)
-            except ValueError:
-                pass  # Ignora se non trovato (caso raro)
         return child
     
     def update(self, result):
@@ -96,6 +94,11 @@ def monte_carlo_tree_search(game, state, timeout=2.7):
         capture_moves.sort(key=lambda m: len(m[2]), reverse=True)
         return capture_moves[0]
     
+    # Alla radice le mosse equivalenti per simmetria portano a posizioni equivalenti: se ne prova una sola
+    root_moves = game.unique_actions(state)
+    root_moves.sort(key=lambda m: len(m[2]), reverse=True)
+    root.untried_moves = array('I', [game.encode_move(m) for m in reversed(root_moves)])
+    
     iterations = 0
     try:
         while time.time() < end_time:
@@ -109,7 +112,7 @@ def monte_carlo_tree_search(game, state, timeout=2.7):
                 node = expand(node, game)
             
             # Fase 3: Simulazione (con cache)
-            state_hash = hash_state(node.state)
+            state_hash = hash_state(game, node.state)
             if state_hash in simulation_cache:
                 result = simulation_cache[state_hash]
             else:
@@ -142,20 +145,12 @@ def monte_carlo_tree_search(game, state, timeout=2.7):
     # Debug info se necessario
     # print(f"MCTS: {iterations} iterazioni in {time.time() - start_time:.3f}s")
     
-    return best_move
+    return game.decode_move(best_move)
 
-def hash_state(state):
-    """Funzione hash efficiente per gli stati di gioco"""
-    # Versione semplificata per velocità
-    board_str = ""
-    for row in state.board:
-        for cell in row:
-            if cell is None:
-                board_str += "N"
-            else:
-                player, pip = cell
-                board_str += player[0] + str(pip)
-    return hash(board_str + state.to_move)
+def hash_state(game, state):
+    """Chiave hash dello stato: la chiave canonica rispetto alle simmetrie della board,
+    così le 8 posizioni equivalenti condividono lo stesso risultato di simulazione"""
+    return game.canonical(state)[0]
 
 def select(node, game):
     """Selezione ottimizzata"""
@@ -174,16 +169,16 @@ def select(node, game):
 def expand(node, game):
     """Espansione prioritizzando mosse di cattura"""
     untried = node.get_untried_moves(game)
-    move = untried[0]  # Già ordinate per potenziale di cattura
-    new_state = game.result(node.state, move)
+    move = untried.pop()  # Già ordinate per potenziale di cattura
+    new_state = game.result(node.state, game.decode_move(move))
     return node.add_child(move, new_state)
 
 def simulate(game, state):
     """Simulazione ottimizzata con euristica semi-random"""
-    # Copia veloce dello stato
+    # Copia veloce dello stato: la simulazione lo modifica poi sul posto con make_move
     current_state = state.copy()
     depth = 0
-    max_simulation_depth = 25  # Limite per evitare simulazioni troppo lunghe
+    max_simulation_depth = state.size * state.size  # Limite per evitare simulazioni troppo lunghe (25 su 5x5)
     
     # Simulazione rapida con preferenza per catture
     while not game.is_terminal(current_state) and depth < max_simulation_depth:
@@ -234,11 +229,12 @@ def simulate(game, state):
                 top_moves = move_values[:max(1, len(move_values)//2)]
                 move = random.choice([m for _, m in top_moves])
         
-        current_state = game.result(current_state, move)
+        game.make_move(current_state, move)
     
     # Valutazione rapida finale
     if game.is_terminal(current_state):
-        return 1 if game.utility(current_state, "Blue") > 0 else 0
+        # Vittoria del Blue 1, pareggio 0.5, sconfitta 0
+        return (game.utility(current_state, "Blue") + 1) / 2
     else:
         # Valutazione euristica se simulazione troncata
         blue_count = current_state.count("Blue")
@@ -284,4 +280,5 @@ def playerStrategy(game, state):
             return best_capture
     
     # Altrimenti usa MCTS
-    return monte_carlo_tree_search(game, state, timeout=2.7)
\ No newline at end of file
+    # Il 90% del limite di tempo della mossa, come i 2.7 secondi sui 3 della GUI
+    return monte_carlo_tree_search(game, state, timeout=0.9 * game.time_out)
\ No newline at end of file
@@ -1,162 +1,31 @@
-import math
-
-def minimax_search(game, state):
-    """Search game tree to determine best move; return (value, move) pair."""
-
-    player = state.to_move
-
-    def max_value(state):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = -infinity, None
-        for a in game.actions(state):
-            v2, _ = min_value(game.result(state, a))
-            if v2 > v:
-                v, move = v2, a
-        return v, move
-
-    def min_value(state):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = +infinity, None
-        for a in game.actions(state):
-            v2, _ = max_value(game.result(state, a))
-            if v2 < v:
-                v, move = v2, a
-        return v, move
-
-    return max_value(state)
-
-infinity = math.inf
-
-def alphabeta_search(game, state):
-    """Search game to determine best action; use alpha-beta pruning.
-    As in [Figure 5.7], this version searches all the way to the leaves."""
-
-    player = state.to_move
-
-    def max_value(state, alpha, beta):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = -infinity, None
-        for a in game.actions(state):
-            v2, _ = min_value(game.result(state, a), alpha, beta)
-            if v2 > v:
-                v, move = v2, a
-                alpha = max(alpha, v)
-            if v >= beta:
-                return v, move
-        return v, move
-
-    def min_value(state, alpha, beta):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = +infinity, None
-        for a in game.actions(state):
-            v2, _ = max_value(game.result(state, a), alpha, beta)
-            if v2 < v:
-                v, move = v2, a
-                beta = min(beta, v)
-            if v <= alpha:
-                return v, move
-        return v, move
-
-    return max_value(state, -infinity, +infinity)
-
-
-
-def cache1(function):
-    "Like lru_cache(None), but only considers the first argument of function."
-    cache = {}
-    def wrapped(x, *args):
-        if x not in cache:
-            cache[x] = function(x, *args)
-        return cache[x]
-    return wrapped
+import endgameTablebase
+import searchEngine
+from searchEngine import SearchContext, alphabeta_search, cutoff_depth, infinity, minimax_search
 
+def new_context():
+    """A search context (see searchEngine.SearchContext) with the evaluator of this module and
+    tables of its own. The players create one per colour and search with its methods."""
+    return SearchContext(evaluate, tablebase=endgameTablebase.shared_tablebase())
 
 def alphabeta_search_tt(game, state):
-    """Search game to determine best action; use alpha-beta pruning.
-    As in [Figure 5.7], this version searches all the way to the leaves."""
-
-    player = state.to_move
-
-    @cache1
-    def max_value(state, alpha, beta):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = -infinity, None
-        for a in game.actions(state):
-            v2, _ = min_value(game.result(state, a), alpha, beta)
-            if v2 > v:
-                v, move = v2, a
-                alpha = max(alpha, v)
-            if v >= beta:
-                return v, move
-        return v, move
-
-    @cache1
-    def min_value(state, alpha, beta):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = +infinity, None
-        for a in game.actions(state):
-            v2, _ = max_value(game.result(state, a), alpha, beta)
-            if v2 < v:
-                v, move = v2, a
-                beta = min(beta, v)
-            if v <= alpha:
-                return v, move
-        return v, move
-
-    return max_value(state, -infinity, +infinity)
+    """Search game to determine best action; use alpha-beta pruning with a
+    transposition table. As in [Figure 5.7], this version searches all the way to the leaves."""
+    return searchEngine.alphabeta_search_tt(game, state, context.tt)
 
-def cutoff_depth(d):
-    """A cutoff function that searches to depth d."""
-    return lambda game, state, depth: depth > d
+def h_alphabeta_search(game, state, cutoff=cutoff_depth(2), quiescence=None, lmr=None):
+    """Search game to determine best action; use alpha-beta pruning with the
+    transposition table of this module, evaluating the cutoff positions with h."""
+    return context.h_alphabeta_search(game, state, cutoff, quiescence, lmr)
 
-def h_alphabeta_search(game, state, cutoff=cutoff_depth(2)):
-    """Search game to determine best action; use alpha-beta pruning.
-    As in [Figure 5.7], this version searches all the way to the leaves."""
-
-    player = state.to_move
-
-    @cache1
-    def max_value(state, alpha, beta, depth):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        if cutoff(game, state, depth):
-            return h(state, player), None
-        v, move = -infinity, None
-        for a in game.actions(state):
-            v2, _ = min_value(game.result(state, a), alpha, beta, depth+1)
-            if v2 > v:
-                v, move = v2, a
-                alpha = max(alpha, v)
-            if v >= beta:
-                return v, move
-        return v, move
-
-    @cache1
-    def min_value(state, alpha, beta, depth):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        if cutoff(game, state, depth):
-            return h(state, player), None
-        v, move = +infinity, None
-        for a in game.actions(state):
-            v2, _ = max_value(game.result(state, a), alpha, beta, depth + 1)
-            if v2 < v:
-                v, move = v2, a
-                beta = min(beta, v)
-            if v <= alpha:
-                return v, move
-        return v, move
-
-    return max_value(state, -infinity, +infinity, 0)
+def evaluate(game, state, player):
+    """Adapts h(board, player) to the evaluator signature of the search engine."""
+    return h(state, player)
 
 def h (board, player):
     """implementare euristica qui"""
     
     return 0
 
+
+# Context of the search functions of this module (created here, after the evaluator)
+context = new_context()
@@ -1,230 +1,47 @@
-import math
+import boardFeatures
+import endgameTablebase
+import searchEngine
+from searchEngine import SearchContext, alphabeta_search, cutoff_depth, infinity, minimax_search
 
 #euristica finale consegnata
 
 
 
-casella_player = 0
-casella_opponent = 0 
-player1 = ""
-opponent1 = ""
-
-def minimax_search(game, state):
-    """Search game tree to determine best move; return (value, move) pair."""
-
-    player = state.to_move
-
-    def max_value(state):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = -infinity, None
-        for a in game.actions(state):
-            v2, _ = min_value(game.result(state, a))
-            if v2 > v:
-                v, move = v2, a
-        return v, move
-
-    def min_value(state):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = +infinity, None
-        for a in game.actions(state):
-            v2, _ = max_value(game.result(state, a))
-            if v2 < v:
-                v, move = v2, a
-        return v, move
-
-    return max_value(state)
-
-infinity = math.inf
-
-def alphabeta_search(game, state):
-    """Search game to determine best action; use alpha-beta pruning.
-    As in [Figure 5.7], this version searches all the way to the leaves."""
-
-    player = state.to_move
-
-    def max_value(state, alpha, beta):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = -infinity, None
-        for a in game.actions(state):
-            v2, _ = min_value(game.result(state, a), alpha, beta)
-            if v2 > v:
-                v, move = v2, a
-                alpha = max(alpha, v)
-            if v >= beta:
-                return v, move
-        return v, move
-
-    def min_value(state, alpha, beta):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = +infinity, None
-        for a in game.actions(state):
-            v2, _ = max_value(game.result(state, a), alpha, beta)
-            if v2 < v:
-                v, move = v2, a
-                beta = min(beta, v)
-            if v <= alpha:
-                return v, move
-        return v, move
-
-    return max_value(state, -infinity, +infinity)
-
-
-
-def cache1(function):
-    "Like lru_cache(None), but only considers the first argument of function."
-    cache = {}
-    def wrapped(x, *args):
-        if x not in cache:
-            cache[x] = function(x, *args)
-        return cache[x]
-    return wrapped
-
+def new_context():
+    """A search context (see searchEngine.SearchContext) with the evaluator of this module and
+    tables of its own. The players create one per colour and search with its methods."""
+    return SearchContext(Evaluator(), tablebase=endgameTablebase.shared_tablebase())
 
 def alphabeta_search_tt(game, state):
-    """Search game to determine best action; use alpha-beta pruning.
-    As in [Figure 5.7], this version searches all the way to the leaves."""
-
-    player = state.to_move
-
-    @cache1
-    def max_value(state, alpha, beta):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = -infinity, None
-        for a in game.actions(state):
-            v2, _ = min_value(game.result(state, a), alpha, beta)
-            if v2 > v:
-                v, move = v2, a
-                alpha = max(alpha, v)
-            if v >= beta:
-                return v, move
-        return v, move
-
-    @cache1
-    def min_value(state, alpha, beta):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        v, move = +infinity, None
-        for a in game.actions(state):
-            v2, _ = max_value(game.result(state, a), alpha, beta)
-            if v2 < v:
-                v, move = v2, a
-                beta = min(beta, v)
-            if v <= alpha:
-                return v, move
-        return v, move
-
-    return max_value(state, -infinity, +infinity)
-
-def cutoff_depth(d):
-    """A cutoff function that searches to depth d."""
-    return lambda game, state, depth: depth > d
-
-def h_alphabeta_search(game, state, cutoff=cutoff_depth(2)):
-    """Search game to determine best action; use alpha-beta pruning.
-    As in [Figure 5.7], this version searches all the way to the leaves."""
-
-    player = state.to_move
-
-    @cache1
-    def max_value(state, alpha, beta, depth):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        if cutoff(game, state, depth):
-            return h(game, state, player), None
-        v, move = -infinity, None
-        for a in game.actions(state):
-            v2, _ = min_value(game.result(state, a), alpha, beta, depth+1)
-            if v2 > v:
-                v, move = v2, a
-                alpha = max(alpha, v)
-            if v >= beta:
-                return v, move
-        return v, move
-
-    @cache1
-    def min_value(state, alpha, beta, depth):
-        if game.is_terminal(state):
-            return game.utility(state, player), None
-        if cutoff(game, state, depth):
-            return h(game, state, player), None
-        v, move = +infinity, None
-        for a in game.actions(state):
-            v2, _ = max_value(game.result(state, a), alpha, beta, depth + 1)
-            if v2 < v:
-                v, move = v2, a
-                beta = min(beta, v)
-            if v <= alpha:
-                return v, move
-        return v, move
-
-    return max_value(state, -infinity, +infinity, 0)
-
-
-def h(game, state, player):
+    """Search game to determine best action; use alpha-beta pruning with a
+    transposition table. As in [Figure 5.7], this version searches all the way to the leaves."""
+    return searchEngine.alphabeta_search_tt(game, state, context.tt)
+
+def h_alphabeta_search(game, state, cutoff=cutoff_depth(2), quiescence=None, lmr=None):
+    """Search game to determine best action; use alpha-beta pruning with the
+    transposition table of this module, evaluating the cutoff positions with h."""
+    return context.h_alphabeta_search(game, state, cutoff, quiescence, lmr)
+
+def h(game, state, player, features=None):
     opponent = "Red" if player == "Blue" else "Blue"
-   
-   #celle occupate da ogni concorrente
-    player_cells = 0
-    opponent_cells = 0
+    # Celle e pip sono contatori della board; bonus centrali e minacce vengono da features, che
+    # nella ricerca li aggiorna a ogni mossa (vedi Evaluator): la valutazione non scandisce la board
+    if features is None:
+        features = boardFeatures.BoardFeatures(state)
+    #celle occupate da ogni concorrente
+    player_cells = state.count(player)
+    opponent_cells = state.count(opponent)
 
     #pips indica la somma dei valori numerici nelle celle controllate
-    player_pips = 0
-    opponent_pips = 0
-
-    #threat sono le minacce dell'avversario
-    player_threat = 0
-    opponent_threat = 0
-
-
-    center_control = 0
-    mobility = len(game.actions(state))
-
-    center = state.size // 2
-
-    for r in range(state.size):
-        for c in range(state.size):
-            cell = state.board[r][c]
-            if cell is not None:
-                owner, pip = cell
-
-                dist_to_center = abs(r - center) + abs(c - center)
-                center_bonus = max(0, 3 - dist_to_center)
-
-                if owner == player:
-                    player_cells += 1
-                    player_pips += pip
-                    center_control += center_bonus
-
-
-                    for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < state.size and 0 <= nc < state.size:
-                            neighbor = state.board[nr][nc]
-                            if neighbor and neighbor[0] == opponent and neighbor[1] <= 5:
-                                opponent_threat += 1
-                elif owner == opponent:
-                    opponent_cells += 1
-                    opponent_pips += pip
-
-                    for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < state.size and 0 <= nc < state.size:
-                            neighbor = state.board[nr][nc]
-                            if neighbor and neighbor[0] == player and neighbor[1] <= 5:
-                                player_threat += 1
-
-    global casella_player, casella_opponent
-    casella_player = player_cells
-    casella_opponent = opponent_cells
-    
-    global player1, opponent1
-    player1 = player
-    opponent1 = opponent
+    player_pips = state.pips(player)
+    opponent_pips = state.pips(opponent)
+
+    #threat sono le minacce dell'avversario: coppie (cella con pip <= 5, cella avversaria adiacente)
+    player_threat = features.threats(player)
+    opponent_threat = features.threats(opponent)
+
+    center_control = features.center_control(player)
+    mobility = game.count_actions(state)
 
     score = (
         4 * (player_cells - opponent_cells) +
@@ -235,5 +52,18 @@ def h(game, state, player):
         1.0 * opponent_threat
     )
     return score
-    
 
+
+class Evaluator(boardFeatures.BoardFeatures):
+    """h with the centre bonus and threats kept up to date by the search through the moves,
+    instead of being counted on the board at every evaluation. It follows one search at a
+    time, so every search context gets its own instance. A state that is not the position
+    followed since the last reset (for example one evaluated outside a search) is counted
+    from scratch."""
+
+    def __call__(self, game, state, player):
+        return h(game, state, player, self if self.follows(state) else None)
+
+
+# Context of the search functions of this module (created here, after the evaluator)
+context = new_context()
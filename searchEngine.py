@@ -0,0 +1,764 @@
+import math
+import random
+import time
+
+infinity = math.inf
+
+# Bound types stored in the transposition table.
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Exact values of the final positions (those of game.utility) and of the endgame solver.
+WIN, DRAW, LOSS = 1, 0, -1
+
+# With at most this many empty cells the search first tries to solve the position exactly.
+ENDGAME_EMPTY_CELLS = 3
+
+# Values depend on the root player (the heuristics are not antisymmetric),
+# so the table key also includes the player the search is for.
+PLAYER_SALT = {"Blue": 0, "Red": random.Random("Cephalopod root player").getrandbits(64)}
+
+
+def symmetric_heuristics(size):
+    """True if the heuristics give the same value to the 8 positions equivalent by symmetry.
+    The centre terms measure the distance from the cell (size // 2, size // 2), which is the
+    centre of the board only when size is odd: on even boards the symmetries change the value,
+    and keeping one move per group of symmetric moves can drop the best one."""
+    return size % 2 == 1
+
+
+class TranspositionTable:
+    """Fixed-size transposition table.
+    Every slot holds a tuple (key, depth, bound, value, encoded move, generation): the tuple is
+    replaced in one step, so a search still running in another thread (for example after a GUI
+    time-out) cannot leave inconsistent entries.
+    Replacement policy: a slot is overwritten if it is empty, if it holds the same position, if
+    its entry comes from an earlier search, or if the new entry is at least as deep."""
+
+    def __init__(self, size=1 << 16):
+        if size & (size - 1):
+            raise ValueError("The table size must be a power of 2")
+        self.mask = size - 1
+        self.slots = [None] * size
+        self.generation = 0
+        self.evaluator = None
+        self.probes = self.hits = self.stores = 0
+
+    def __len__(self):
+        return sum(1 for entry in self.slots if entry is not None)
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.probes = self.hits = self.stores = 0
+
+    def new_search(self, evaluator=None):
+        """Called at the start of every search: the entries of earlier searches stay usable but
+        become replaceable. The table is cleared if the evaluation function changes."""
+        if evaluator != self.evaluator:
+            self.clear()
+            self.evaluator = evaluator
+        self.generation += 1
+
+    def probe(self, key):
+        """Returns (depth, bound, value, move) for key, or None."""
+        self.probes += 1
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        index = key & self.mask
+        old = self.slots[index]
+        if old is None or old[0] == key or old[5] != self.generation or depth >= old[1]:
+            self.slots[index] = (key, depth, flag, score, move, self.generation)
+            self.stores += 1
+
+    def best_move(self, key):
+        """Encoded move stored for key, or None."""
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry[4]
+        return None
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its deadline has passed."""
+
+
+class SearchStats:
+    """Counters collected during a search."""
+
+    def __init__(self):
+        self.nodes = 0          # interior and leaf nodes visited
+        self.evaluations = 0    # positions evaluated with h because the cutoff fired
+        self.inexact = 0        # values that depend on the cutoff: evaluations and hits of depth-limited entries
+        self.expanded = 0       # nodes whose moves were searched
+        self.cutoffs = 0        # expanded nodes that failed high (beta cutoff)
+        self.first_cutoffs = 0  # beta cutoffs produced by the first move searched
+        self.cutoff_index = 0   # sum of the positions (from 0) of the moves that produced the cutoffs
+        self.researches = 0     # null-window searches that failed high and were repeated with the full window
+        self.aspiration_fails = 0  # root searches repeated because the value fell outside the aspiration window
+        self.mtdf_passes = 0    # null-window searches of the root made by mtdf_search
+        self.quiescence_nodes = 0  # nodes searched by the quiescence search, beyond the cutoff
+        self.reduced = {}       # remaining depth -> moves searched with a late-move reduction
+        self.reduction_researches = {}  # remaining depth -> reduced moves that beat alpha and were searched again
+
+    def cutoff_rate(self):
+        """Fraction of expanded nodes that ended with a beta cutoff."""
+        return self.cutoffs / self.expanded if self.expanded else 0.0
+
+    def first_move_rate(self):
+        """Fraction of beta cutoffs produced by the first move: the quality of the move ordering."""
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def mean_cutoff_index(self):
+        return self.cutoff_index / self.cutoffs if self.cutoffs else 0.0
+
+    def reductions_report(self):
+        """One line per remaining depth: reduced moves and how many of them were searched again."""
+        lines = []
+        for depth in sorted(self.reduced, reverse=True):
+            reduced = self.reduced[depth]
+            researched = self.reduction_researches.get(depth, 0)
+            lines.append("depth %d: %d reduced, %d searched again (%.3f)" % (depth, reduced, researched,
+                                                                           researched / reduced))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return ("nodes %d, evaluations %d, cutoff rate %.3f, first-move cutoffs %.3f, mean cutoff index %.2f"
+                % (self.nodes, self.evaluations, self.cutoff_rate(), self.first_move_rate(), self.mean_cutoff_index()))
+
+
+class MoveOrdering:
+    """Move ordering of the alpha-beta search: the best move stored in the transposition table,
+    then the captures by captured pip mass (the pip of the placed die), then the killer moves
+    of the ply, then the other placements by history score.
+
+    Killer moves are the placements that produced a beta cutoff at the same ply in another
+    branch; the history score of a placement grows by depth*depth at every cutoff it produces.
+    Both are kept for the placements without captures only, indexed by cell, and survive
+    across searches (history scores are halved at every new search).
+    captures, killers and history switch the single heuristics off, to measure them."""
+
+    def __init__(self, captures=True, killers=True, history=True, n_killers=2):
+        self.captures = captures
+        self.killers = killers
+        self.history = history
+        self.n_killers = n_killers
+        self.killer_moves = []
+        self.history_scores = {}
+
+    def new_search(self):
+        for scores in self.history_scores.values():
+            for i, score in enumerate(scores):
+                scores[i] = score >> 1
+
+    def moves(self, game, state, ply, tt_move=None):
+        """Moves of state in search order. At the root (ply 0) moves that are symmetric
+        duplicates lead to equivalent positions, so only one of them is returned when the
+        heuristics are symmetric too (see symmetric_heuristics)."""
+        if ply == 0 and symmetric_heuristics(state.size):
+            moves = game.unique_actions(state)
+        else:
+            moves = game.actions(state)
+        first = None
+        if tt_move is not None:
+            first = game.decode_move(tt_move)
+            yield first
+        if not (self.captures or self.killers or self.history):
+            for a in moves:
+                if a != first:
+                    yield a
+            return
+        captures = []
+        placements = []
+        for a in moves:
+            if a != first:
+                (captures if a[2] else placements).append(a)
+        if self.captures:
+            captures.sort(key=capture_mass, reverse=True)
+        yield from captures
+        size = state.size
+        if self.history and placements:
+            scores = self._history(state)
+            placements.sort(key=lambda a: scores[a[0][0] * size + a[0][1]], reverse=True)
+        if self.killers and ply < len(self.killer_moves):
+            killers = self.killer_moves[ply]
+            # The killers are tried first, in the order they were stored, if they are legal here
+            rank = {cell: k for k, cell in enumerate(killers)}
+            placements.sort(key=lambda a: rank.get(a[0][0] * size + a[0][1], len(killers)))
+        yield from placements
+
+    def cutoff(self, state, move, ply, depth):
+        """Records that move, played in state at ply with the given remaining depth, caused a beta cutoff."""
+        if move[2]:
+            return
+        cell = move[0][0] * state.size + move[0][1]
+        if self.killers:
+            while len(self.killer_moves) <= ply:
+                self.killer_moves.append([])
+            # The list is replaced, not modified: a search pondering in another thread may be reading it
+            killers = [cell] + [k for k in self.killer_moves[ply] if k != cell]
+            self.killer_moves[ply] = killers[:self.n_killers]
+        if self.history:
+            depth = depth if depth is not None and depth != infinity else 1
+            self._history(state)[cell] += depth * depth
+
+    def _history(self, state):
+        scores = self.history_scores.get(state.to_move)
+        if scores is None or len(scores) != state.size * state.size:
+            scores = self.history_scores[state.to_move] = [0] * (state.size * state.size)
+        return scores
+
+
+def capture_mass(move):
+    """Sort key of the captures: captured pip mass, then number of captured dice."""
+    return move[1], len(move[2])
+
+
+def late_move_reductions(min_depth=3, late_moves=3, step=6, max_reduction=2):
+    """Schedule of the late-move reductions: a function (depth, index) -> plies of reduction
+    for the move in position index (from 0) of a node with the given remaining depth.
+    Nodes with less than min_depth plies to go and their first late_moves moves are not
+    reduced; the others are reduced by 1 ply, plus 1 every step moves, up to max_reduction,
+    and never below 1 ply of remaining depth."""
+    def reduction(depth, index):
+        if depth < min_depth or index < late_moves:
+            return 0
+        return min(1 + (index - late_moves) // step, max_reduction, depth - 2)
+    return reduction
+
+
+def cutoff_depth(d):
+    """A cutoff function that searches to depth d."""
+    cutoff = lambda game, state, depth: depth > d
+    # The search engine reads the nominal depth to know the remaining depth of each node
+    cutoff.depth = d
+    return cutoff
+
+
+def h_alphabeta_search(game, state, cutoff=cutoff_depth(2), h=None, tt=None, deadline=None, stats=None, ordering=None,
+                       pvs=False, alpha=-infinity, beta=+infinity, quiescence=None, lmr=None):
+    """Search game to determine best action; use alpha-beta pruning with a
+    transposition table. h(game, state, player) evaluates the positions where
+    cutoff fires, from the point of view of the player to move at the root; final
+    positions are worth WIN, DRAW or LOSS (game.utility).
+
+    This is max_value/min_value of [Figure 5.7] written in negamax form: every
+    node maximizes the value for its own player to move. The table stores depth,
+    score, bound type (exact/lower/upper) and best move of every searched node,
+    so its values are reused only when they are valid for the current window.
+    Subtrees searched down to the end of the game without any cutoff are stored
+    with infinite depth: their values are exact at any depth. Moves are searched
+    in the order given by ordering (a MoveOrdering).
+    With pvs the search is a principal variation search (NegaScout): only the first
+    move of every node is searched with the full window, the others with a null
+    window that just tells whether they are better, and they are searched again
+    with the full window only when they are. The root is searched with the window
+    (alpha, beta); a value outside the window is only a bound.
+    With quiescence (a number of plies), the positions where cutoff fires are not
+    evaluated directly: the search goes on with capture moves only, for at most
+    that many plies, until the position is quiet. The player to move can also
+    stop capturing and keep the evaluation of the position (stand pat).
+    With lmr (a schedule such as late_move_reductions()), late placements without
+    captures are searched with a null window at reduced depth, and searched again
+    at full depth only when they beat alpha.
+    If h also has the methods reset, make and unmake (an incremental evaluator such as
+    boardFeatures.BoardFeatures), it follows the moves of the search: reset(state) on the
+    root, make(state, move) before every move and unmake() after undoing it, so it can
+    update features of the position instead of recomputing them at every evaluation.
+    If deadline (a time.perf_counter() value) passes, SearchTimeout is raised.
+    Returns (value, move) with value from the point of view of the root player."""
+
+    player = state.to_move
+    # The tree is walked with make/unmake on a private copy of the root
+    state = state.copy()
+    incremental = hasattr(h, "make")
+    if incremental:
+        h.reset(state)
+    if tt is None:
+        tt = TranspositionTable()
+    # Entries computed with different quiescence or reductions are not comparable
+    tt.new_search((h, quiescence, lmr))
+    if stats is None:
+        stats = SearchStats()
+    if ordering is None:
+        ordering = MoveOrdering()
+    ordering.new_search()
+    clock = time.perf_counter
+    salt = PLAYER_SALT[player]
+    # Remaining depth of the root, when the cutoff has a nominal depth
+    max_depth = getattr(cutoff, "depth", None)
+    root_depth = max_depth + 1 if max_depth is not None else None
+
+    def value(state, depth, alpha, beta, ply):
+        stats.nodes += 1
+        if deadline is not None and clock() > deadline:
+            raise SearchTimeout()
+        if game.is_terminal(state):
+            return game.utility(state, state.to_move), None
+        # With a nominal depth the cutoff fires when no plies are left (also after a reduction)
+        if depth <= 0 if depth is not None else cutoff(game, state, ply):
+            if quiescence:
+                return quiesce(state, alpha, beta, quiescence), None
+            stats.evaluations += 1
+            stats.inexact += 1
+            v = h(game, state, player)
+            return (v if state.to_move == player else -v), None
+        key = state.key ^ salt
+        inexact = stats.inexact
+        entry = tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_depth, flag, score, tt_move = entry
+            if tt_depth == infinity or (depth is not None and tt_depth >= depth):
+                if tt_depth != infinity:
+                    stats.inexact += 1
+                if flag == EXACT:
+                    return score, game.decode_move(tt_move)
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score, game.decode_move(tt_move)
+        alpha_orig = alpha
+        v, move = -infinity, None
+        child_depth = depth - 1 if depth is not None else None
+        stats.expanded += 1
+        for index, a in enumerate(ordering.moves(game, state, ply, tt_move)):
+            if incremental:
+                h.make(state, a)
+            undo = game.make_move(state, a)
+            reduction = lmr(depth, index) if lmr is not None and depth is not None and not a[2] else 0
+            if reduction > 0:
+                stats.reduced[depth] = stats.reduced.get(depth, 0) + 1
+                v2 = -value(state, child_depth - reduction, -math.nextafter(alpha, infinity), -alpha, ply + 1)[0]
+                if v2 > alpha:
+                    stats.reduction_researches[depth] = stats.reduction_researches.get(depth, 0) + 1
+                    v2 = -value(state, child_depth, -beta, -alpha, ply + 1)[0]
+            elif pvs and index > 0:
+                # Null window (alpha, next float after alpha): the search only tells whether v2 > alpha
+                v2 = -value(state, child_depth, -math.nextafter(alpha, infinity), -alpha, ply + 1)[0]
+                if alpha < v2 < beta:
+                    stats.researches += 1
+                    v2 = -value(state, child_depth, -beta, -alpha, ply + 1)[0]
+            else:
+                v2 = -value(state, child_depth, -beta, -alpha, ply + 1)[0]
+            game.unmake_move(state, undo)
+            if incremental:
+                h.unmake()
+            if v2 > v:
+                v, move = v2, a
+                alpha = max(alpha, v)
+            if v >= beta:
+                stats.cutoffs += 1
+                stats.cutoff_index += index
+                if index == 0:
+                    stats.first_cutoffs += 1
+                ordering.cutoff(state, a, ply, depth)
+                break
+        flag = UPPER if v <= alpha_orig else LOWER if v >= beta else EXACT
+        if stats.inexact == inexact:
+            stored_depth = infinity
+        else:
+            # Without a nominal depth the entry is only useful for move ordering
+            stored_depth = depth if depth is not None else -1
+        tt.store(key, stored_depth, flag, v, game.encode_move(move))
+        return v, move
+
+    def quiesce(state, alpha, beta, remaining):
+        stats.evaluations += 1
+        stats.inexact += 1
+        v = h(game, state, player)
+        v = v if state.to_move == player else -v
+        # Stand pat: the evaluation is a lower bound, the player can avoid the captures
+        if v >= beta or remaining == 0:
+            return v
+        alpha = max(alpha, v)
+        captures = [a for a in game.actions(state) if a[2]]
+        captures.sort(key=capture_mass, reverse=True)
+        for a in captures:
+            stats.nodes += 1
+            stats.quiescence_nodes += 1
+            if deadline is not None and clock() > deadline:
+                raise SearchTimeout()
+            if incremental:
+                h.make(state, a)
+            undo = game.make_move(state, a)
+            if game.is_terminal(state):
+                v2 = -game.utility(state, state.to_move)
+            else:
+                v2 = -quiesce(state, -beta, -alpha, remaining - 1)
+            game.unmake_move(state, undo)
+            if incremental:
+                h.unmake()
+            if v2 > v:
+                v = v2
+                alpha = max(alpha, v)
+            if v >= beta:
+                break
+        return v
+
+    return value(state, root_depth, alpha, beta, 0)
+
+
+def pvs_search(game, state, cutoff=cutoff_depth(2), h=None, tt=None, deadline=None, stats=None, ordering=None,
+               quiescence=None, lmr=None):
+    """Principal variation search: h_alphabeta_search with null windows for all
+    the moves after the first one of every node. Returns (value, move)."""
+    return h_alphabeta_search(game, state, cutoff, h, tt, deadline, stats, ordering, pvs=True, quiescence=quiescence,
+                              lmr=lmr)
+
+
+def mtdf_search(game, state, cutoff=cutoff_depth(2), h=None, tt=None, first_guess=None, deadline=None, stats=None,
+                ordering=None, quiescence=None, lmr=None):
+    """MTD(f): find the value of state with a sequence of null-window searches of
+    h_alphabeta_search, each one telling whether the value is above or below a test
+    value, starting from first_guess (by default the evaluation h of state).
+    The transposition table keeps the bounds found by each pass, so the following
+    passes re-search only the part of the tree that changes. Returns (value, move)."""
+    player = state.to_move
+    if tt is None:
+        tt = TranspositionTable()
+    if stats is None:
+        stats = SearchStats()
+    if ordering is None:
+        ordering = MoveOrdering()
+    if first_guess is None and hasattr(h, "reset"):
+        # An incremental evaluator first has to follow state
+        h.reset(state)
+    g = first_guess if first_guess is not None else h(game, state, player)
+    lower, upper = -infinity, +infinity
+    move = None
+    while lower < upper:
+        # Test value: the search tells whether the value is >= beta
+        beta = g if g > lower else math.nextafter(lower, infinity)
+        stats.mtdf_passes += 1
+        g, m = h_alphabeta_search(game, state, cutoff, h, tt, deadline, stats, ordering,
+                                  alpha=math.nextafter(beta, -infinity), beta=beta, quiescence=quiescence,
+                                  lmr=lmr)
+        if g < beta:
+            upper = g
+            if move is None:
+                move = m
+        else:
+            lower = g
+            # A pass that fails high has a move reaching at least g
+            move = m
+    return g, move
+
+
+def iterative_deepening_search(game, state, h, time_limit=2.5, tt=None, max_depth=None, stats=None, ordering=None,
+                               pvs=False, aspiration=None, mtdf=False, quiescence=None, lmr=None,
+                               endgame_cells=None, endgame_tt=None, tablebase=None, start_depth=0):
+    """Iterative deepening on top of h_alphabeta_search: search with cutoff depth
+    start_depth, start_depth + 1, ... until time_limit seconds have passed, and return (value, move, depth)
+    of the deepest completed iteration. The best move of each iteration is stored in
+    the transposition table and tried first by the next one; killer moves and
+    history scores of ordering are also carried from one iteration to the next.
+    With pvs every iteration is a principal variation search. With aspiration, every
+    iteration after the first searches the window (v - aspiration, v + aspiration)
+    around the value v of the previous one, and widens it to infinity on the side
+    where the value falls outside. With mtdf every iteration is an mtdf_search
+    starting from the value of the previous one. quiescence and lmr are passed to every iteration.
+
+    With endgame_cells, positions with at most that many empty cells are first
+    given to solve_endgame (with the table endgame_tt) for half of the time: if
+    it finishes, the result is (WIN, DRAW or LOSS, proven best move, infinity).
+    Captures empty cells again, so even a few empty cells can hide a long game:
+    when the solver runs out of time the heuristic search uses the rest.
+    Positions found in tablebase (an endgameTablebase.Tablebase) are answered
+    before any search, in the same form as the solver results. An iteration whose
+    value does not depend on the cutoff is exact and also returns depth infinity."""
+    deadline = time.perf_counter() + time_limit
+    if tt is None:
+        tt = TranspositionTable()
+    if stats is None:
+        stats = SearchStats()
+    if ordering is None:
+        ordering = MoveOrdering()
+    if tablebase is not None:
+        entry = tablebase.lookup(game, state)
+        if entry is not None:
+            return entry[0], entry[1], infinity
+    if endgame_cells is not None and state.count_empty() <= endgame_cells:
+        try:
+            v, move = solve_endgame(game, state, endgame_tt, deadline - time_limit / 2, stats)
+            return v, move, infinity
+        except SearchTimeout:
+            pass
+    # Fallback if not even the first iteration completes
+    best = (None, game.unique_actions(state)[0], -1)
+    depth = start_depth
+    while max_depth is None or depth <= max_depth:
+        inexact = stats.inexact
+        alpha, beta = -infinity, +infinity
+        if aspiration is not None and best[0] is not None:
+            alpha, beta = best[0] - aspiration, best[0] + aspiration
+        try:
+            if mtdf:
+                v, move = mtdf_search(game, state, cutoff_depth(depth), h, tt, best[0], deadline, stats, ordering,
+                                      quiescence, lmr)
+            else:
+                while True:
+                    v, move = h_alphabeta_search(game, state, cutoff_depth(depth), h, tt, deadline, stats, ordering,
+                                                 pvs, alpha, beta, quiescence, lmr)
+                    if v <= alpha:
+                        alpha = -infinity
+                    elif v >= beta:
+                        beta = +infinity
+                    else:
+                        break
+                    stats.aspiration_fails += 1
+        except SearchTimeout:
+            break
+        # Nothing depended on the cutoff: the value is exact and deeper searches give the same result
+        if stats.inexact == inexact:
+            best = (v, move, infinity)
+            break
+        best = (v, move, depth)
+        depth += 1
+    return best
+
+
+def solve_endgame(game, state, tt=None, deadline=None, stats=None):
+    """Exact solver: alpha-beta search to the end of the game where every final
+    position is a win, draw or loss for the player to move (more cells than the
+    opponent is a win), with no heuristic. With only three values the window is
+    tiny and a winning move cuts off all its siblings, so this is much faster
+    than searching the same tree with h. Captures empty cells again and make the
+    game longer, so after the best move of the table the placements without
+    captures are tried first, then the captures with fewer captured dice.
+    The transposition table stores exact results and must not be shared with
+    the heuristic searches.
+    Returns (value, move) with value WIN, DRAW or LOSS for the player to move,
+    and move a proven best move; raises SearchTimeout if deadline passes."""
+    state = state.copy()
+    if tt is None:
+        tt = TranspositionTable()
+    tt.new_search(solve_endgame)
+    if stats is None:
+        stats = SearchStats()
+    clock = time.perf_counter
+    opponent = {"Blue": "Red", "Red": "Blue"}
+
+    def value(state, alpha, beta, ply):
+        stats.nodes += 1
+        if deadline is not None and clock() > deadline:
+            raise SearchTimeout()
+        if state.is_full():
+            mine, theirs = state.count(state.to_move), state.count(opponent[state.to_move])
+            return (WIN if mine > theirs else LOSS if mine < theirs else DRAW), None
+        # The values are relative to the player to move, so the key needs no salt
+        key = state.key
+        entry = tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            _, flag, score, tt_move = entry
+            if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+                return score, game.decode_move(tt_move)
+        alpha_orig = alpha
+        v, move = -infinity, None
+        stats.expanded += 1
+        for index, a in enumerate(endgame_moves(state, ply, tt_move)):
+            undo = game.make_move(state, a)
+            v2 = -value(state, -beta, -alpha, ply + 1)[0]
+            game.unmake_move(state, undo)
+            if v2 > v:
+                v, move = v2, a
+                alpha = max(alpha, v)
+            if v >= beta:
+                stats.cutoffs += 1
+                stats.cutoff_index += index
+                if index == 0:
+                    stats.first_cutoffs += 1
+                break
+        flag = UPPER if v <= alpha_orig else LOWER if v >= beta else EXACT
+        tt.store(key, infinity, flag, v, game.encode_move(move))
+        return v, move
+
+    def endgame_moves(state, ply, tt_move):
+        first = None
+        if tt_move is not None:
+            first = game.decode_move(tt_move)
+            yield first
+        moves = game.unique_actions(state) if ply == 0 else game.actions(state)
+        moves = [a for a in moves if a != first]
+        moves.sort(key=lambda a: (len(a[2]), a[1]))
+        yield from moves
+
+    return value(state, LOSS, WIN, 0)
+
+
+def ponder(game, state, h, stop, tt, ordering=None, predicted_time=5.0, slice_time=0.1, quiescence=None, lmr=None):
+    """Search on the opponent's time: state is the position after our move, with the
+    opponent to move, and the search goes on until stop (a threading.Event) is set.
+    The position after the reply predicted by tt (the best move stored for state by
+    our last search) is searched first, for at most predicted_time seconds, then the
+    positions after all the replies in turn. The searches fill tt and ordering, so
+    the next search from the position after the actual reply starts from their
+    results: tt, ordering, h, quiescence and lmr must be those of that search.
+    The searches are iterative deepening of slice_time seconds, so stop is noticed
+    within slice_time; each one restarts from the depths already stored in tt.
+    A position whose value is exact is not searched again, and the function returns
+    early when every reply has an exact value."""
+    player = "Red" if state.to_move == "Blue" else "Blue"
+    if ordering is None:
+        ordering = MoveOrdering()
+    replies = game.actions(state)
+    predicted = tt.best_move(state.key ^ PLAYER_SALT[player])
+    if predicted is not None and game.decode_move(predicted) in replies:
+        predicted = game.decode_move(predicted)
+        child = game.result(state, predicted)
+        end = time.perf_counter() + predicted_time
+        while not stop.is_set() and time.perf_counter() < end and not game.is_terminal(child):
+            if iterative_deepening_search(game, child, h, slice_time, tt, None, None, ordering,
+                                          quiescence=quiescence, lmr=lmr)[2] == infinity:
+                break
+    replies.sort(key=capture_mass, reverse=True)
+    children = [game.result(state, a) for a in replies]
+    children = [child for child in children if not game.is_terminal(child)]
+    while children and not stop.is_set():
+        searched = []
+        for child in children:
+            if stop.is_set():
+                break
+            # An exact result (infinite depth) would come back from the table at once: searching
+            # the child again would only spin and halve the history scores at every call
+            if iterative_deepening_search(game, child, h, slice_time, tt, None, None, ordering,
+                                          quiescence=quiescence, lmr=lmr)[2] != infinity:
+                searched.append(child)
+        else:
+            children = searched
+
+
+def minimax_search(game, state):
+    """Search game tree to determine best move; return (value, move) pair.
+    The tree is walked with make/unmake on a private copy of state."""
+
+    player = state.to_move
+    state = state.copy()
+
+    def max_value(state):
+        if game.is_terminal(state):
+            return game.utility(state, player), None
+        v, move = -infinity, None
+        for a in game.actions(state):
+            undo = game.make_move(state, a)
+            v2, _ = min_value(state)
+            game.unmake_move(state, undo)
+            if v2 > v:
+                v, move = v2, a
+        return v, move
+
+    def min_value(state):
+        if game.is_terminal(state):
+            return game.utility(state, player), None
+        v, move = +infinity, None
+        for a in game.actions(state):
+            undo = game.make_move(state, a)
+            v2, _ = max_value(state)
+            game.unmake_move(state, undo)
+            if v2 < v:
+                v, move = v2, a
+        return v, move
+
+    return max_value(state)
+
+
+def alphabeta_search(game, state):
+    """Search game to determine best action; use alpha-beta pruning.
+    As in [Figure 5.7], this version searches all the way to the leaves.
+    Moves are generated lazily, biggest captures first, so a cutoff stops generation early."""
+
+    player = state.to_move
+    state = state.copy()
+
+    def max_value(state, alpha, beta):
+        if game.is_terminal(state):
+            return game.utility(state, player), None
+        v, move = -infinity, None
+        for a in game.iter_actions(state, "captures"):
+            undo = game.make_move(state, a)
+            v2, _ = min_value(state, alpha, beta)
+            game.unmake_move(state, undo)
+            if v2 > v:
+                v, move = v2, a
+                alpha = max(alpha, v)
+            if v >= beta:
+                return v, move
+        return v, move
+
+    def min_value(state, alpha, beta):
+        if game.is_terminal(state):
+            return game.utility(state, player), None
+        v, move = +infinity, None
+        for a in game.iter_actions(state, "captures"):
+            undo = game.make_move(state, a)
+            v2, _ = max_value(state, alpha, beta)
+            game.unmake_move(state, undo)
+            if v2 < v:
+                v, move = v2, a
+                beta = min(beta, v)
+            if v <= alpha:
+                return v, move
+        return v, move
+
+    return max_value(state, -infinity, +infinity)
+
+
+def alphabeta_search_tt(game, state, tt=None):
+    """Search game to determine best action; use alpha-beta pruning with a
+    transposition table. As in [Figure 5.7], this version searches all the way to the leaves."""
+    return h_alphabeta_search(game, state, cutoff_depth(infinity), None, tt)
+
+
+class SearchContext:
+    """The state shared by the searches of one player: the evaluator h(game, state, player)
+    (an incremental evaluator keeps the features of the searched position, so every context
+    needs its own instance),
+    the transposition table tt, the move ordering (killer moves and history scores), the
+    table endgame_tt of the endgame solver and the endgame tablebase. Positions with at
+    most endgame_cells empty cells are first given to the endgame solver.
+    The searches keep all their state in the context (and in their own stack frames), so
+    searches with different contexts can run at the same time, for example the search of
+    one player while the other one ponders. The searches of one context must not overlap:
+    stop the ponder of a context before starting its next search."""
+
+    def __init__(self, h, tt=None, ordering=None, endgame_tt=None, tablebase=None, endgame_cells=ENDGAME_EMPTY_CELLS):
+        self.h = h
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.ordering = ordering if ordering is not None else MoveOrdering()
+        self.endgame_tt = endgame_tt if endgame_tt is not None else TranspositionTable()
+        self.tablebase = tablebase
+        self.endgame_cells = endgame_cells
+
+    def h_alphabeta_search(self, game, state, cutoff=cutoff_depth(2), quiescence=None, lmr=None):
+        return h_alphabeta_search(game, state, cutoff, self.h, self.tt, ordering=self.ordering,
+                                  quiescence=quiescence, lmr=lmr)
+
+    def pvs_search(self, game, state, cutoff=cutoff_depth(2)):
+        return pvs_search(game, state, cutoff, self.h, self.tt, ordering=self.ordering)
+
+    def mtdf_search(self, game, state, cutoff=cutoff_depth(2), first_guess=None):
+        return mtdf_search(game, state, cutoff, self.h, self.tt, first_guess, ordering=self.ordering)
+
+    def solve_endgame(self, game, state, time_limit=None):
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        return solve_endgame(game, state, self.endgame_tt, deadline)
+
+    def iterative_deepening_search(self, game, state, time_limit=2.5, pvs=False, aspiration=None, mtdf=False,
+                                   quiescence=None, lmr=None, endgame_cells=None):
+        """iterative_deepening_search with the tables of the context; endgame_cells
+        defaults to the one of the context (0 disables the endgame solver)."""
+        if endgame_cells is None:
+            endgame_cells = self.endgame_cells
+        return iterative_deepening_search(game, state, self.h, time_limit, self.tt, ordering=self.ordering, pvs=pvs,
+                                          aspiration=aspiration, mtdf=mtdf, quiescence=quiescence, lmr=lmr,
+                                          endgame_cells=endgame_cells, endgame_tt=self.endgame_tt,
+                                          tablebase=self.tablebase)
+
+    def ponder(self, game, state, stop, quiescence=None, lmr=None):
+        ponder(game, state, self.h, stop, self.tt, self.ordering, quiescence=quiescence, lmr=lmr)
@@ -0,0 +1,37 @@
+"""Giocatore con ricerca a tempo, comune ai moduli player che usano una strategia di playingStrategies*.
+
+Un modulo player crea un SearchPlayer con il modulo della strategia ed espone i suoi metodi
+playerStrategy e ponder, i nomi che la GUI cerca nei moduli dei giocatori.
+"""
+import openingBook
+
+# Frazione del time-out di ogni mossa (game.time_out) spesa nella ricerca
+TIME_FRACTION = 0.8
+
+
+class SearchPlayer:
+    """Risponde alle posizioni del libro delle aperture della strategia senza cercare; altrimenti
+    esegue l'iterative deepening alpha-beta con l'euristica della strategia per una frazione
+    time_fraction del time-out della mossa. Ha un contesto di ricerca per colore: quando lo
+    stesso giocatore gioca entrambi i lati, la ricerca di un lato e il pondering dell'altro non
+    condividono le tabelle."""
+
+    def __init__(self, strategy, time_fraction=TIME_FRACTION):
+        self.time_fraction = time_fraction
+        # Libri delle aperture generati con openingBook.py (vuoto se non è stato generato nessun file)
+        self.book = openingBook.OpeningBook(strategy.__name__)
+        self.contexts = {"Blue": strategy.new_context(), "Red": strategy.new_context()}
+
+    def playerStrategy(self, game, state):
+        move = self.book.lookup(game, state)
+        if move is not None:
+            return move
+        value, move, depth = self.contexts[state.to_move].iterative_deepening_search(
+            game, state, self.time_fraction * game.time_out)
+        return move
+
+    def ponder(self, game, state, stop_event):
+        """Chiamato dalla GUI dopo la nostra mossa: finché l'avversario pensa, cerca le posizioni
+        dopo le sue risposte, fino a quando stop_event viene impostato."""
+        player = "Red" if state.to_move == "Blue" else "Blue"
+        self.contexts[player].ponder(game, state, stop_event)
@@ -0,0 +1,221 @@
+"""Controlli del motore di gioco su partite casuali con seme fissato (python -m pytest test_engine.py).
+
+Le mosse, i contatori e la chiave di Board, le caratteristiche incrementali delle euristiche e il
+motore vettoriale vengono confrontati con un calcolo da zero della stessa posizione.
+"""
+import random
+
+import pytest
+
+import boardFeatures
+import searchEngine
+from CephalopodGame import CephalopodGame, get_subsets
+
+SIZES = (3, 4, 5, 6)
+
+
+def reference_actions(state):
+    """Mosse legali calcolate sulla vista a righe, come nella prima versione di CephalopodGame.actions."""
+    moves = []
+    for r in range(state.size):
+        for c in range(state.size):
+            if state.board[r][c] is None:
+                adjacent = []
+                for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < state.size and 0 <= nc < state.size and state.board[nr][nc] is not None:
+                        adjacent.append(((nr, nc), state.board[nr][nc][1]))
+                capture_moves = []
+                if len(adjacent) >= 2:
+                    for subset in get_subsets(adjacent, 2):
+                        s = sum(pip for pos, pip in subset)
+                        if 2 <= s <= 6:
+                            capture_moves.append(((r, c), s, tuple(pos for pos, pip in subset)))
+                moves.extend(capture_moves or [((r, c), 1, ())])
+    return moves
+
+
+def random_game(game, seed, max_plies=200):
+    """Stati di una partita casuale, dalla board vuota fino alla fine (o a max_plies mosse)."""
+    rng = random.Random(seed)
+    state = game.initial
+    states = [state]
+    while not game.is_terminal(state) and len(states) <= max_plies:
+        state = game.result(state, rng.choice(game.actions(state)))
+        states.append(state)
+    return states
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_move_generation_matches_reference(size):
+    game = CephalopodGame(size)
+    for seed in range(5):
+        for state in random_game(game, seed):
+            moves = game.actions(state)
+            assert moves == reference_actions(state)
+            assert list(game.iter_actions(state)) == moves
+            assert sorted(game.iter_actions(state, "captures")) == sorted(moves)
+            assert game.count_actions(state) == len(moves)
+            assert game.count_captures(state) == sum(1 for move in moves if move[2])
+            assert [game.decode_move(game.encode_move(move)) for move in moves] == moves
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_make_unmake_restores_key_and_counters(size):
+    game = CephalopodGame(size)
+    rng = random.Random(size)
+    for seed in range(5):
+        state = game.initial.copy()
+        undos = []
+        copies = [state.copy()]
+        while not game.is_terminal(state):
+            move = rng.choice(game.actions(state))
+            expected = game.result(state, move)
+            undos.append(game.make_move(state, move))
+            assert state == expected
+            assert state.key == expected.key == state.compute_key()
+            assert state._counters == expected._counters == state.compute_counters()
+            copies.append(state.copy())
+        copies.pop()
+        while undos:
+            game.unmake_move(state, undos.pop())
+            previous = copies.pop()
+            assert state == previous
+            assert (state.key, state._counters, state.to_move, state.last_move) == \
+                   (previous.key, previous._counters, previous.to_move, previous.last_move)
+            assert state.board == previous.board
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_incremental_features_match_recount(size):
+    game = CephalopodGame(size)
+    rng = random.Random(size)
+    state = game.initial.copy()
+    features = boardFeatures.BoardFeatures(state)
+    undos = []
+    while not game.is_terminal(state):
+        move = rng.choice(game.actions(state))
+        features.make(state, move)
+        undos.append(game.make_move(state, move))
+        assert features.values == boardFeatures.BoardFeatures(state).values
+    while undos:
+        game.unmake_move(state, undos.pop())
+        features.unmake()
+        assert features.values == boardFeatures.BoardFeatures(state).values
+
+
+@pytest.mark.parametrize("size", (3, 4))
+def test_utility_is_win_draw_loss_for_player(size):
+    game = CephalopodGame(size)
+    for seed in range(100):
+        final = random_game(game, seed)[-1]
+        blue, red = final.count("Blue"), final.count("Red")
+        expected = (blue > red) - (blue < red)
+        assert game.utility(final, "Blue") == expected
+        assert game.utility(final, "Red") == -expected
+
+
+def test_alphabeta_finds_exact_value_one_move_from_the_end():
+    game = CephalopodGame(4)
+    for seed in range(30):
+        # Una sola cella vuota e nessuna cattura: la prossima mossa riempie la board
+        states = [state for state in random_game(game, seed)
+                  if state.count_empty() == 1 and game.count_captures(state) == 0]
+        for state in states:
+            exact, _ = searchEngine.solve_endgame(game, state)
+            value, move = searchEngine.h_alphabeta_search(game, state, searchEngine.cutoff_depth(8),
+                                                          lambda game, state, player: 0)
+            assert value == exact
+            assert game.utility(game.result(state, move), state.to_move) == exact
+
+
+@pytest.mark.parametrize("size", (3, 4, 5))
+def test_batch_engine_matches_scalar_engine(size):
+    np = pytest.importorskip("numpy")
+    from CephalopodBatch import BatchCephalopodGame
+    n_boards = 32
+    rng = np.random.default_rng(size)
+    game = CephalopodGame(size)
+    batch = BatchCephalopodGame(n_boards, size)
+    states = [game.initial] * n_boards
+    while not batch.is_terminal().all():
+        mask = batch.legal_mask()
+        for i, state in enumerate(states):
+            assert batch.to_board(i) == state
+            assert bool(batch.is_terminal()[i]) == game.is_terminal(state)
+            assert {batch.action_to_move(i, a) for a in np.nonzero(mask[i])[0]} == set(game.actions(state))
+        actions = batch.random_actions(rng)
+        active = ~batch.is_terminal()
+        states = [game.result(state, batch.action_to_move(i, actions[i])) if active[i] else state
+                  for i, state in enumerate(states)]
+        batch.step(actions, active)
+    for player in ("Blue", "Red"):
+        assert list(batch.utility(player)) == [game.utility(state, player) for state in states]
+
+
+def test_shared_table_is_cleared_only_when_the_evaluator_changes():
+    import parallelSearch
+    import playingStrategies_euristica1
+    import playingStrategies_Gallo_Mari
+    game = CephalopodGame(3)
+    # Un solo processo: nessun processo di lavoro, la tabella condivisa è usata dal chiamante
+    search = parallelSearch.ParallelSearch(playingStrategies_Gallo_Mari.Evaluator(), 1, tt_size=1 << 10)
+    clears = []
+    clear = search.table.clear
+    search.table.clear = lambda: (clears.append(1), clear())
+    try:
+        state = game.initial
+        for _ in range(2):
+            search.search(game, state, 0.2, h=playingStrategies_Gallo_Mari.Evaluator())
+            state = game.result(state, game.actions(state)[0])
+        assert len(clears) == 1
+        assert len(search.table) > 0
+        search.search(game, state, 0.2, h=playingStrategies_euristica1.h)
+        assert len(clears) == 2
+    finally:
+        search.close()
+
+
+def test_ponder_returns_once_every_reply_is_exact():
+    import threading
+    import time
+    game = CephalopodGame(3)
+    context = searchEngine.SearchContext(lambda game, state, player: 0)
+    # Due celle vuote e nessuna cattura possibile ora o dopo la risposta: ogni risposta porta a
+    # una posizione non finale con un valore esatto
+    state = next(state for state in random_game(game, 0)
+                 if state.count_empty() == 2 and game.count_captures(state) == 0
+                 and all(game.count_captures(game.result(state, a)) == 0 for a in game.actions(state)))
+    stop = threading.Event()
+    # Rete di sicurezza: se il ponder girasse a vuoto, si ferma comunque dopo 10 s
+    timer = threading.Timer(10.0, stop.set)
+    timer.start()
+    start = time.perf_counter()
+    try:
+        context.ponder(game, state, stop)
+    finally:
+        timer.cancel()
+    assert not stop.is_set()
+    assert time.perf_counter() - start < 5.0
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_symmetries_map_positions_and_moves(size):
+    game = CephalopodGame(size)
+    for seed in range(3):
+        for state in random_game(game, seed)[::3]:
+            key = game.canonical(state)[0]
+            moves = game.actions(state)
+            for t in range(8):
+                transformed = game.transform_state(state, t)
+                assert game.canonical(transformed)[0] == key
+                transformed_moves = set(game.actions(transformed))
+                for move in moves:
+                    image = game.transform_move(move, t)
+                    assert image in transformed_moves
+                    assert game.inverse_transform_move(image, t) == move
+            # unique_actions tiene una mossa per gruppo di mosse equivalenti per simmetria
+            unique = game.unique_actions(state)
+            symmetries = [0] + game.stabilizer(state)
+            assert {game.transform_move(move, t) for move in unique for t in symmetries} == set(moves)
+            assert len({frozenset(game.transform_move(move, t) for t in symmetries) for move in unique}) == len(unique)